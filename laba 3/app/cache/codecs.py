@@ -0,0 +1,99 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Callable
+from uuid import UUID
+
+_encoders: dict[type, Callable[[Any], Any]] = {
+    UUID: str,
+    datetime: lambda value: value.isoformat(),
+}
+
+_decoders: dict[type, Callable[[Any], Any]] = {
+    UUID: UUID,
+    datetime: datetime.fromisoformat,
+}
+
+
+class EntityCodec:
+    """Сериализация сущности в JSON для кэша по описанию полей и их типов
+
+    Из кэша сущность возвращается как SimpleNamespace с теми же атрибутами,
+    что нужны контроллерам для построения ответа.
+    """
+
+    def __init__(self, fields: dict[str, type], defaults: dict[str, Any] | None = None):
+        self.fields = fields
+        self.defaults = defaults or {}
+
+    def to_dict(self, entity: Any) -> dict[str, Any]:
+        data = {}
+        for name, type_ in self.fields.items():
+            value = getattr(entity, name, None)
+            if value is None:
+                value = self.defaults.get(name)
+            if value is not None:
+                value = _encoders.get(type_, type_)(value)
+            data[name] = value
+        return data
+
+    def encode(self, entity: Any) -> str:
+        return json.dumps(self.to_dict(entity))
+
+    def from_dict(self, data: dict[str, Any]) -> SimpleNamespace:
+        values = {}
+        for name, type_ in self.fields.items():
+            value = data.get(name, self.defaults.get(name))
+            if value is not None:
+                value = _decoders.get(type_, type_)(value)
+            values[name] = value
+        return SimpleNamespace(**values)
+
+    def decode(self, raw: str | bytes) -> SimpleNamespace:
+        return self.from_dict(json.loads(raw))
+
+
+USER_CODEC = EntityCodec(
+    {
+        "id": UUID,
+        "login": str,
+        "email": str,
+        "description": str,
+        "created_at": datetime,
+        "updated_at": datetime,
+    },
+    defaults={"description": ""},
+)
+
+PRODUCT_CODEC = EntityCodec(
+    {
+        "id": UUID,
+        "name": str,
+        "quantity": int,
+        "created_at": datetime,
+        "updated_at": datetime,
+    },
+    defaults={"quantity": 0},
+)
+
+ORDER_CODEC = EntityCodec(
+    {
+        "id": UUID,
+        "date": datetime,
+        "user_id": UUID,
+        "address_id": UUID,
+        "product_id": UUID,
+        "created_at": datetime,
+        "updated_at": datetime,
+    }
+)
+
+ADDRESS_CODEC = EntityCodec(
+    {
+        "id": UUID,
+        "user_id": UUID,
+        "street": str,
+        "created_at": datetime,
+        "updated_at": datetime,
+    }
+)
@@ -0,0 +1,416 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Sequence
+from uuid import UUID
+
+from .codecs import ADDRESS_CODEC, ORDER_CODEC, PRODUCT_CODEC, USER_CODEC, EntityCodec
+from .invalidation import publish_invalidation
+from .local_cache import LocalCache, get_local_cache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class EntityCacheConfig:
+    prefix: str
+    codec: EntityCodec
+    ttl: int
+    # TTL записи "не найдено"; 0 - отрицательное кэширование выключено
+    negative_ttl: int = 0
+
+
+ENTITY_CACHES: dict[str, EntityCacheConfig] = {
+    "user": EntityCacheConfig(
+        "user:",
+        USER_CODEC,
+        int(os.getenv("CACHE_TTL_USER", "3600")),
+        int(os.getenv("CACHE_NEGATIVE_TTL_USER", "30")),
+    ),
+    "product": EntityCacheConfig(
+        "product:",
+        PRODUCT_CODEC,
+        int(os.getenv("CACHE_TTL_PRODUCT", "600")),
+        int(os.getenv("CACHE_NEGATIVE_TTL_PRODUCT", "30")),
+    ),
+    "order": EntityCacheConfig(
+        "order:", ORDER_CODEC, int(os.getenv("CACHE_TTL_ORDER", "600"))
+    ),
+    "address": EntityCacheConfig(
+        "address:", ADDRESS_CODEC, int(os.getenv("CACHE_TTL_ADDRESS", "3600"))
+    ),
+}
+
+
+# Разброс TTL (доля от TTL), чтобы записанные пачкой ключи не истекали разом
+CACHE_TTL_JITTER = float(os.getenv("CACHE_TTL_JITTER", "0.1"))
+# Насколько охотно обновлять запись до истечения (XFetch); 0 - выключено
+CACHE_EARLY_REFRESH_BETA = float(os.getenv("CACHE_EARLY_REFRESH_BETA", "1.0"))
+
+# Служебные поля записи в Redis: время загрузки из БД и момент истечения
+_DELTA_FIELD = "_delta"
+_EXPIRES_FIELD = "_expires"
+# Запись-надгробие: сущности с таким ID в БД нет
+_MISSING_FIELD = "_missing"
+_TOMBSTONE = json.dumps({_MISSING_FIELD: True})
+_MISSING = object()
+
+
+@dataclass
+class StampedeStats:
+    """Счётчики защиты от лавины промахов"""
+
+    loads: int = 0
+    coalesced: int = 0
+    early_refreshes: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "early_refreshes": self.early_refreshes,
+        }
+
+
+stampede_stats = StampedeStats()
+
+
+@dataclass
+class NegativeCacheStats:
+    """Счётчики надгробий: записано и сэкономлено чтений из БД"""
+
+    writes: int = 0
+    prevented_reads: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {"writes": self.writes, "prevented_reads": self.prevented_reads}
+
+
+negative_cache_stats = NegativeCacheStats()
+
+
+class _LoadAborted(Exception):
+    """Загрузка, которую ждали другие запросы, была отменена"""
+
+
+# Загрузки из БД, идущие в процессе: ключ -> future с результатом
+_inflight: dict[str, asyncio.Future] = {}
+# Сколько запросов присоединилось к идущей загрузке по ключу
+_joined: dict[str, int] = {}
+
+
+class EntityCache:
+    """Кэш сущностей в Redis: read-through, write-through и инвалидация
+
+    Кэш - только оптимизация: при недоступном Redis запросы идут в БД,
+    а ошибки кэша пишутся в лог и не роняют запрос. Перед Redis может стоять
+    L1-кэш в памяти процесса; он работает только вместе с Redis, через который
+    записи и удаления рассылаются остальным воркерам (см. invalidation.py).
+
+    От лавины промахов при истечении горячего ключа защищают три приёма:
+    одна загрузка из БД на ключ в процессе (остальные запросы ждут её),
+    вероятностное обновление записи незадолго до истечения (XFetch)
+    и случайный разброс TTL.
+    """
+
+    def __init__(
+        self,
+        redis: Any,
+        config: EntityCacheConfig,
+        local: LocalCache | None = None,
+    ):
+        self._redis = redis
+        self.prefix = config.prefix
+        self.codec = config.codec
+        self.ttl = config.ttl
+        self.negative_ttl = config.negative_ttl
+        self._local = local if redis is not None else None
+
+    @classmethod
+    def for_entity(cls, name: str, redis: Any) -> "EntityCache":
+        return cls(redis, ENTITY_CACHES[name], get_local_cache(name))
+
+    @property
+    def enabled(self) -> bool:
+        return self._redis is not None
+
+    def key(self, id: UUID) -> str:
+        return f"{self.prefix}{id}"
+
+    async def get(self, id: UUID) -> Any | None:
+        entity, _ = await self._read(self.key(id))
+        return None if entity is _MISSING else entity
+
+    async def _read(self, key: str) -> tuple[Any | None, bool]:
+        """Прочитать запись; второй элемент - пора ли обновить её заранее"""
+        if not self.enabled:
+            return None, False
+        generation = None
+        if self._local is not None:
+            cached = self._local.get(key)
+            if cached is not None:
+                return cached, False
+            generation = self._local.generation(key)
+        try:
+            raw = await self._redis.get(key)
+            if not raw:
+                return None, False
+            entity, refresh = self._decode(raw)
+        except Exception as e:
+            logger.warning("Cache read failed for %s: %s", key, e)
+            return None, False
+        if refresh:
+            return entity, True
+        if self._local is not None and entity is not _MISSING:
+            self._local.set(key, entity, generation)
+        return entity, False
+
+    def _decode(self, raw: str | bytes) -> tuple[Any, bool]:
+        data = json.loads(raw)
+        if data.get(_MISSING_FIELD):
+            return _MISSING, False
+        return self.codec.from_dict(data), self._should_refresh(data)
+
+    @staticmethod
+    def _should_refresh(data: dict[str, Any]) -> bool:
+        delta = data.get(_DELTA_FIELD) or 0.0
+        expires = data.get(_EXPIRES_FIELD)
+        if not delta or expires is None or CACHE_EARLY_REFRESH_BETA <= 0:
+            return False
+        # XFetch: чем ближе истечение и дольше загрузка, тем выше вероятность
+        gap = -delta * CACHE_EARLY_REFRESH_BETA * math.log(1.0 - random.random())
+        return time.time() + gap >= expires
+
+    def _jittered_ttl(self) -> int:
+        spread = self.ttl * CACHE_TTL_JITTER
+        return max(1, round(self.ttl + random.uniform(-spread, spread)))
+
+    def _entry(self, data: dict[str, Any], load_time: float) -> tuple[int, str]:
+        """TTL и содержимое записи в Redis вместе со служебными полями"""
+        ttl = self._jittered_ttl()
+        payload = {
+            **data,
+            _DELTA_FIELD: round(load_time, 6),
+            _EXPIRES_FIELD: time.time() + ttl,
+        }
+        return ttl, json.dumps(payload)
+
+    async def set(
+        self, entity: Any, load_time: float = 0.0, generation: int | None = None
+    ) -> None:
+        """Записать сущность в Redis и L1
+
+        generation - поколение ключа в L1 на момент начала загрузки из БД:
+        если ключ с тех пор инвалидировали, загруженное могло устареть
+        и не записывается.
+        """
+        if not self.enabled or entity is None:
+            return
+        key = self.key(entity.id)
+        if self._local is not None:
+            if generation is not None and generation != self._local.generation(key):
+                self._local.stale_fills += 1
+                return
+            # Заполнения L1, начатые до этой записи, станут устаревшими
+            self._local.delete(key)
+            generation = self._local.generation(key)
+        try:
+            data = self.codec.to_dict(entity)
+            await self._redis.setex(key, *self._entry(data, load_time))
+        except Exception as e:
+            logger.warning("Cache write failed for %s: %s", key, e)
+            return
+        if self._local is not None:
+            self._local.set(key, self.codec.from_dict(data), generation)
+            await self._publish_invalidation([key])
+
+    async def set_many(self, entities: list[Any], load_time: float = 0.0) -> None:
+        """Записать несколько сущностей одним конвейером (pipeline)"""
+        if not self.enabled or not entities:
+            return
+        keys = [self.key(entity.id) for entity in entities]
+        if self._local is not None:
+            self._local.delete(*keys)
+            generations = [self._local.generation(key) for key in keys]
+        try:
+            items = [self.codec.to_dict(entity) for entity in entities]
+            pipe = self._redis.pipeline(transaction=False)
+            for key, data in zip(keys, items):
+                pipe.setex(key, *self._entry(data, load_time))
+            await pipe.execute()
+        except Exception as e:
+            logger.warning("Cache write failed for %s: %s", keys, e)
+            return
+        if self._local is not None:
+            for key, data, generation in zip(keys, items, generations):
+                self._local.set(key, self.codec.from_dict(data), generation)
+            await self._publish_invalidation(keys)
+
+    async def set_missing(self, *ids: UUID) -> None:
+        """Запомнить на negative_ttl, что сущностей с такими ID нет"""
+        if not self.enabled or not ids or self.negative_ttl <= 0:
+            return
+        keys = [self.key(id) for id in ids]
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.setex(key, self.negative_ttl, _TOMBSTONE)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning("Cache write failed for %s: %s", keys, e)
+            return
+        negative_cache_stats.writes += len(keys)
+
+    async def delete(self, *ids: UUID) -> None:
+        if not self.enabled or not ids:
+            return
+        keys = [self.key(id) for id in ids]
+        try:
+            await self._redis.delete(*keys)
+        except Exception as e:
+            logger.warning("Cache invalidation failed for %s: %s", keys, e)
+        if self._local is not None:
+            # После удаления из Redis: чтение, успевшее получить старое
+            # значение, не вернёт его в L1
+            self._local.delete(*keys)
+            await self._publish_invalidation(keys)
+
+    async def _publish_invalidation(self, keys: list[str]) -> None:
+        try:
+            await publish_invalidation(self._redis, keys)
+        except Exception as e:
+            logger.warning("Cache invalidation publish failed for %s: %s", keys, e)
+
+    async def get_or_load(
+        self, id: UUID, loader: Callable[[UUID], Awaitable[Any | None]]
+    ) -> Any | None:
+        """Read-through: вернуть из кэша или загрузить и положить в кэш"""
+        key = self.key(id)
+        cached, refresh = await self._read(key)
+        if cached is _MISSING:
+            negative_cache_stats.prevented_reads += 1
+            return None
+        if cached is not None and not refresh:
+            return cached
+        if refresh:
+            stampede_stats.early_refreshes += 1
+        return await self._load_once(key, id, loader)
+
+    async def get_many(
+        self,
+        ids: list[UUID],
+        loader: Callable[[list[UUID]], Awaitable[Sequence[Any]]],
+    ) -> dict[UUID, Any]:
+        """Read-through для набора ID: один MGET, одна загрузка промахов из БД
+
+        Возвращает найденные сущности по ID; отсутствующих в БД в ответе нет.
+        """
+        found: dict[UUID, Any] = {}
+        tombstones: set[UUID] = set()
+        generations: dict[UUID, int] = {}
+        missing = list(dict.fromkeys(ids))
+        if self.enabled and missing:
+            if self._local is not None:
+                for id in missing:
+                    key = self.key(id)
+                    cached = self._local.get(key)
+                    if cached is not None:
+                        found[id] = cached
+                    else:
+                        generations[id] = self._local.generation(key)
+                missing = [id for id in missing if id not in found]
+            if missing:
+                try:
+                    raws = await self._redis.mget([self.key(id) for id in missing])
+                    for id, raw in zip(missing, raws):
+                        if not raw:
+                            continue
+                        entity, refresh = self._decode(raw)
+                        if entity is _MISSING:
+                            tombstones.add(id)
+                            continue
+                        if refresh:
+                            stampede_stats.early_refreshes += 1
+                            continue
+                        found[id] = entity
+                        if self._local is not None:
+                            self._local.set(self.key(id), entity, generations[id])
+                except Exception as e:
+                    logger.warning("Cache read failed for %s ids: %s", self.prefix, e)
+                negative_cache_stats.prevented_reads += len(tombstones)
+                missing = [
+                    id for id in missing if id not in found and id not in tombstones
+                ]
+        if not missing:
+            return found
+
+        stampede_stats.loads += 1
+        started = time.perf_counter()
+        loaded = await loader(missing)
+        fresh = list(loaded)
+        if self._local is not None:
+            # Инвалидированные во время загрузки могли устареть: не кэшируем
+            fresh = [
+                entity
+                for entity in loaded
+                if generations[entity.id] == self._local.generation(self.key(entity.id))
+            ]
+            self._local.stale_fills += len(loaded) - len(fresh)
+        await self.set_many(fresh, time.perf_counter() - started)
+        found.update((entity.id, entity) for entity in loaded)
+        await self.set_missing(*(id for id in missing if id not in found))
+        return found
+
+    async def _load_once(
+        self, key: str, id: UUID, loader: Callable[[UUID], Awaitable[Any | None]]
+    ) -> Any | None:
+        """Одна загрузка на ключ: параллельные промахи ждут первую"""
+        flight = _inflight.get(key)
+        if flight is not None:
+            stampede_stats.coalesced += 1
+            _joined[key] = _joined.get(key, 0) + 1
+            try:
+                return await asyncio.shield(flight)
+            except _LoadAborted:
+                return await self._load_once(key, id, loader)
+
+        flight = asyncio.get_running_loop().create_future()
+        # Исключение помечается полученным, даже если загрузку никто не ждал
+        flight.add_done_callback(lambda f: f.exception())
+        _inflight[key] = flight
+        generation = self._local.generation(key) if self._local is not None else None
+        try:
+            stampede_stats.loads += 1
+            started = time.perf_counter()
+            entity = await loader(id)
+            if entity is None:
+                await self.set_missing(id)
+            else:
+                await self.set(entity, time.perf_counter() - started, generation)
+        except Exception as e:
+            flight.set_exception(e)
+            raise
+        except BaseException:
+            flight.set_exception(_LoadAborted())
+            raise
+        else:
+            # Ждущие получают отвязанную копию: ORM-объект принадлежит сессии
+            # загрузившего запроса и станет непригоден, когда она закроется
+            try:
+                shared = entity
+                if entity is not None and _joined.get(key):
+                    shared = self.codec.from_dict(self.codec.to_dict(entity))
+            except Exception as e:
+                flight.set_exception(e)
+            else:
+                flight.set_result(shared)
+        finally:
+            if _inflight.get(key) is flight:
+                del _inflight[key]
+                _joined.pop(key, None)
+        return entity
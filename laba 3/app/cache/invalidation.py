@@ -0,0 +1,76 @@
+import asyncio
+import json
+import logging
+import os
+from uuid import uuid4
+
+from .local_cache import clear_local_caches, evict_local
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache:invalidate")
+# Идентификатор процесса: свои сообщения воркер пропускает, его L1 уже актуален
+WORKER_ID = uuid4().hex
+
+
+async def publish_invalidation(redis, keys: list[str]) -> None:
+    """Сообщить остальным воркерам, что ключи нужно убрать из их L1"""
+    message = json.dumps({"origin": WORKER_ID, "keys": keys})
+    await redis.publish(INVALIDATION_CHANNEL, message)
+
+
+def _handle_message(data: bytes | str) -> None:
+    try:
+        message = json.loads(data)
+    except ValueError:
+        logger.warning("Malformed cache invalidation message: %r", data)
+        return
+    if message.get("origin") != WORKER_ID:
+        evict_local(message.get("keys", []))
+
+
+async def _listen() -> None:
+    while True:
+        redis = get_redis()
+        if redis is None:
+            return
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Пока подписки не было, события могли потеряться
+            clear_local_caches()
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if message is not None:
+                    _handle_message(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Cache invalidation listener failed: %s", e)
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
+
+
+class _ListenerState:
+    task: asyncio.Task | None = None
+
+
+async def start_invalidation_listener() -> None:
+    """Подписаться на канал инвалидации L1 (после открытия пула Redis)"""
+    if get_redis() is None or _ListenerState.task is not None:
+        return
+    _ListenerState.task = asyncio.create_task(_listen())
+
+
+async def stop_invalidation_listener() -> None:
+    task, _ListenerState.task = _ListenerState.task, None
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,128 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class LocalCache:
+    """Кэш в памяти процесса: LRU с ограничением по числу записей и TTL
+
+    У каждого ключа есть поколение, которое растёт при удалении ключа.
+    Заполнение, начатое до удаления (чтение из Redis, загрузка из БД),
+    передаёт поколение, взятое в начале, и отбрасывается, если оно устарело.
+    Поколения помнятся для maxsize последних удалённых ключей; для остальных
+    действует общий нижний порог, поэтому забытый ключ тоже не пропустит
+    устаревшее заполнение.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._generations: OrderedDict[str, int] = OrderedDict()
+        self._clock = 0
+        self._floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_fills = 0
+
+    def get(self, key: str) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def generation(self, key: str) -> int:
+        return self._generations.get(key, self._floor)
+
+    def set(self, key: str, value: Any, generation: int | None = None) -> None:
+        """Записать значение; с поколением - только если ключ не удаляли"""
+        if generation is not None and generation != self.generation(key):
+            self.stale_fills += 1
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+            self._clock += 1
+            self._generations[key] = self._clock
+            self._generations.move_to_end(key)
+        while len(self._generations) > self.maxsize:
+            _, self._floor = self._generations.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._generations.clear()
+        self._clock += 1
+        self._floor = self._clock
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stale_fills": self.stale_fills,
+        }
+
+
+def _l1_enabled(entity: str, default: bool) -> bool:
+    value = os.getenv(f"CACHE_L1_{entity.upper()}")
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# По умолчанию L1 включён только для горячих сущностей
+L1_DEFAULTS = {"user": True, "product": True, "order": False, "address": False}
+
+_local_caches: dict[str, LocalCache | None] = {}
+
+
+def get_local_cache(entity: str) -> LocalCache | None:
+    """Общий для процесса L1-кэш сущности; None, если он выключен флагом"""
+    if entity not in _local_caches:
+        cache = None
+        if _l1_enabled(entity, L1_DEFAULTS.get(entity, False)):
+            cache = LocalCache(
+                maxsize=int(os.getenv(f"CACHE_L1_MAXSIZE_{entity.upper()}", "1000")),
+                ttl=float(os.getenv(f"CACHE_L1_TTL_{entity.upper()}", "300")),
+            )
+        _local_caches[entity] = cache
+    return _local_caches[entity]
+
+
+def local_cache_stats() -> dict[str, dict[str, int]]:
+    return {
+        entity: cache.stats()
+        for entity, cache in _local_caches.items()
+        if cache is not None
+    }
+
+
+def evict_local(keys: list[str]) -> None:
+    """Убрать ключи из всех L1-кэшей процесса"""
+    for cache in _local_caches.values():
+        if cache is not None:
+            cache.delete(*keys)
+
+
+def clear_local_caches() -> None:
+    for cache in _local_caches.values():
+        if cache is not None:
+            cache.clear()
@@ -7,9 +7,40 @@ except Exception:  # pragma: no cover - redis may not be installed in test env
     redis = None
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+# Сколько ждать свободное соединение, когда все REDIS_MAX_CONNECTIONS заняты
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "1"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", "0.5"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+
+
+class _RedisState:
+    client: Optional["redis.Redis"] = None
+
+
+async def init_redis() -> None:
+    """Открыть общий для процесса пул соединений Redis"""
+    if redis is None or _RedisState.client is not None:
+        return
+    pool = redis.BlockingConnectionPool.from_url(
+        REDIS_URL,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+    )
+    _RedisState.client = redis.Redis(connection_pool=pool)
+
+
+async def close_redis() -> None:
+    """Закрыть пул соединений Redis при остановке процесса"""
+    client, _RedisState.client = _RedisState.client, None
+    if client is not None:
+        await client.aclose(close_connection_pool=True)
 
 
 def get_redis() -> Optional["redis.Redis"]:
-    if redis is None:
-        return None
-    return redis.from_url(REDIS_URL)
+    """Общий клиент Redis; None, пока пул не открыт или redis не установлен"""
+    return _RedisState.client
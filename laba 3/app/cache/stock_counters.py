@@ -0,0 +1,298 @@
+import asyncio
+import logging
+import os
+from typing import Any, Iterable
+from uuid import UUID, uuid4
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..database import async_session_factory
+from ..models import Product
+from ..repositories.product_repository import ProductRepository
+from .entity_cache import EntityCache
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# "db" - остатки читаются и списываются в products.quantity,
+# "redis" - живут в счётчиках Redis и записываются в БД пачками в фоне
+INVENTORY_MODE = os.getenv("INVENTORY_MODE", "db")
+STOCK_FLUSH_INTERVAL = float(os.getenv("STOCK_FLUSH_INTERVAL", "1"))
+STOCK_FLUSH_BATCH = int(os.getenv("STOCK_FLUSH_BATCH", "500"))
+# Дольше самой медленной записи пачки: иначе запись может начать второй воркер
+STOCK_FLUSH_LOCK_TTL = float(os.getenv("STOCK_FLUSH_LOCK_TTL", "30"))
+
+STOCK_PREFIX = "stock:"
+# Счётчики, изменённые после последней записи в БД
+DIRTY_KEY = "stock:dirty"
+# Пачки записывает один воркер за раз: иначе пачка, прочитанная раньше,
+# может зафиксироваться позже и затереть в БД более новый остаток
+FLUSH_LOCK_KEY = "stock:flush:lock"
+
+# KEYS[1] - DIRTY_KEY, KEYS[2..] - счётчики позиций, ARGV - количества.
+# Заказ принимается целиком или не принимается: {1, i} - счётчика позиции i
+# нет, {2, i} - товар закончился; иначе {0, списано по позициям}.
+# Как и при работе через БД, остаток не уходит ниже нуля.
+_RESERVE_SCRIPT = """
+for i = 2, #KEYS do
+  local stock = redis.call('GET', KEYS[i])
+  if not stock then return {1, i - 1} end
+  if tonumber(stock) <= 0 then return {2, i - 1} end
+end
+local result = {0}
+for i = 2, #KEYS do
+  local take = math.min(tonumber(redis.call('GET', KEYS[i])), tonumber(ARGV[i - 1]))
+  redis.call('DECRBY', KEYS[i], take)
+  redis.call('SADD', KEYS[1], KEYS[i])
+  result[#result + 1] = take
+end
+return result
+"""
+
+_RELEASE_SCRIPT = """
+for i = 2, #KEYS do
+  if redis.call('EXISTS', KEYS[i]) == 1 then
+    redis.call('INCRBY', KEYS[i], ARGV[i - 1])
+    redis.call('SADD', KEYS[1], KEYS[i])
+  end
+end
+return 0
+"""
+
+# Снять блокировку, только если она всё ещё наша
+_UNLOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_MISSING_COUNTER = 1
+
+SessionFactory = async_sessionmaker[AsyncSession]
+
+
+class OutOfStockError(ValueError):
+    """Товара нет в наличии или не существует"""
+
+
+def redis_inventory_enabled() -> bool:
+    return INVENTORY_MODE == "redis"
+
+
+def stock_key(product_id: UUID) -> str:
+    return f"{STOCK_PREFIX}{product_id}"
+
+
+def _product_id(key: bytes | str) -> UUID:
+    if isinstance(key, bytes):
+        key = key.decode()
+    return UUID(key[len(STOCK_PREFIX) :])
+
+
+def _client() -> Any:
+    redis = get_redis()
+    if redis is None:
+        raise RuntimeError("INVENTORY_MODE=redis requires a Redis connection")
+    return redis
+
+
+async def reserve_stock(
+    items: list[tuple[UUID, int]],
+    session_factory: SessionFactory = async_session_factory,
+) -> list[int]:
+    """Атомарно проверить и списать остатки по позициям заказа
+
+    Возвращает списанное количество по каждой позиции. Счётчики, которых
+    нет в Redis (например, товар создан, пока Redis был недоступен),
+    подгружаются из БД, и попытка повторяется один раз.
+    """
+    redis = _client()
+    keys = [DIRTY_KEY, *(stock_key(product_id) for product_id, _ in items)]
+    quantities = [quantity for _, quantity in items]
+    reserve = redis.register_script(_RESERVE_SCRIPT)
+    for attempt in range(2):
+        status, *rest = await reserve(keys=keys, args=quantities)
+        if status == 0:
+            return [int(taken) for taken in rest]
+        if status == _MISSING_COUNTER and attempt == 0:
+            await load_stock([product_id for product_id, _ in items], session_factory)
+            continue
+        product_id = items[int(rest[0]) - 1][0]
+        raise OutOfStockError(f"Product {product_id} is out of stock or not found")
+
+
+async def release_stock(items: list[tuple[UUID, int]]) -> None:
+    """Вернуть списанное, если заказ не удалось сохранить"""
+    items = [(product_id, quantity) for product_id, quantity in items if quantity]
+    if not items:
+        return
+    release = _client().register_script(_RELEASE_SCRIPT)
+    await release(
+        keys=[DIRTY_KEY, *(stock_key(product_id) for product_id, _ in items)],
+        args=[quantity for _, quantity in items],
+    )
+
+
+async def _seed(redis: Any, rows: Iterable[tuple[UUID, int]]) -> int:
+    """Создать недостающие счётчики; существующие в Redis не трогаются"""
+    pipe = redis.pipeline(transaction=False)
+    count = 0
+    for product_id, quantity in rows:
+        pipe.set(stock_key(product_id), quantity, nx=True)
+        count += 1
+    if count:
+        await pipe.execute()
+    return count
+
+
+async def load_stock(
+    product_ids: list[UUID], session_factory: SessionFactory = async_session_factory
+) -> None:
+    async with session_factory() as session:
+        result = await session.execute(
+            select(Product.id, Product.quantity).where(Product.id.in_(product_ids))
+        )
+        await _seed(_client(), result.tuples().all())
+
+
+async def sync_stock(*products: Any) -> None:
+    """Перезаписать счётчики остатками, только что записанными в БД
+
+    Счётчики помечаются изменёнными: пачка, прочитавшая старое значение
+    до этой записи, может зафиксироваться после неё и вернуть в БД старый
+    остаток, а следующая пачка снова запишет новый.
+    """
+    if not redis_inventory_enabled() or not products:
+        return
+    keys = [stock_key(product.id) for product in products]
+    pipe = _client().pipeline(transaction=False)
+    for key, product in zip(keys, products):
+        pipe.set(key, product.quantity)
+    pipe.sadd(DIRTY_KEY, *keys)
+    await pipe.execute()
+
+
+async def drop_stock(*product_ids: UUID) -> None:
+    if not redis_inventory_enabled() or not product_ids:
+        return
+    keys = [stock_key(product_id) for product_id in product_ids]
+    pipe = _client().pipeline(transaction=False)
+    pipe.delete(*keys)
+    pipe.srem(DIRTY_KEY, *keys)
+    await pipe.execute()
+
+
+async def flush_stock(session_factory: SessionFactory = async_session_factory) -> int:
+    """Записать пачку изменённых счётчиков в products.quantity одним UPDATE
+
+    Возвращает число записанных товаров; 0 - если пачку сейчас пишет другой
+    воркер. При ошибке БД ключи возвращаются в множество изменённых
+    и будут записаны следующей пачкой.
+    """
+    redis = _client()
+    token = uuid4().hex
+    locked = await redis.set(
+        FLUSH_LOCK_KEY, token, nx=True, px=int(STOCK_FLUSH_LOCK_TTL * 1000)
+    )
+    if not locked:
+        return 0
+    try:
+        return await _flush_batch(redis, session_factory)
+    finally:
+        unlock = redis.register_script(_UNLOCK_SCRIPT)
+        await unlock(keys=[FLUSH_LOCK_KEY], args=[token])
+
+
+async def _flush_batch(redis: Any, session_factory: SessionFactory) -> int:
+    keys = await redis.spop(DIRTY_KEY, STOCK_FLUSH_BATCH)
+    if not keys:
+        return 0
+    values = await redis.mget(keys)
+    quantities = {
+        _product_id(key): int(value)
+        for key, value in zip(keys, values)
+        if value is not None
+    }
+    if not quantities:
+        return 0
+    try:
+        async with session_factory() as session:
+            await ProductRepository(session).set_quantities(quantities)
+            await session.commit()
+    except Exception:
+        await redis.sadd(DIRTY_KEY, *keys)
+        raise
+    await EntityCache.for_entity("product", redis).delete(*quantities)
+    return len(quantities)
+
+
+async def reconcile_stock(
+    session_factory: SessionFactory = async_session_factory,
+) -> int:
+    """Восстановить счётчики по БД после перезапуска
+
+    Сначала в БД дописываются незаписанные изменения, затем для каждого
+    товара создаётся недостающий счётчик. Уцелевшие счётчики Redis новее БД
+    и остаются как есть. Возвращает число просмотренных товаров.
+    """
+    redis = _client()
+    while await flush_stock(session_factory):
+        pass
+    seen = 0
+    async with session_factory() as session:
+        result = await session.stream(
+            select(Product.id, Product.quantity).execution_options(
+                yield_per=STOCK_FLUSH_BATCH
+            )
+        )
+        async for batch in result.tuples().partitions():
+            seen += await _seed(redis, batch)
+    return seen
+
+
+async def _flush_loop() -> None:
+    while True:
+        try:
+            await reconcile_stock()
+            break
+        except Exception as e:
+            logger.warning("Stock reconciliation failed: %s", e)
+            await asyncio.sleep(STOCK_FLUSH_INTERVAL)
+    while True:
+        await asyncio.sleep(STOCK_FLUSH_INTERVAL)
+        try:
+            while await flush_stock() == STOCK_FLUSH_BATCH:
+                pass
+        except Exception as e:
+            logger.warning("Stock flush failed: %s", e)
+
+
+class _FlusherState:
+    task: asyncio.Task | None = None
+
+
+async def start_stock_flusher() -> None:
+    """Сверить счётчики с БД и запустить фоновую запись остатков"""
+    if not redis_inventory_enabled() or get_redis() is None:
+        return
+    if _FlusherState.task is None:
+        _FlusherState.task = asyncio.create_task(_flush_loop())
+
+
+async def stop_stock_flusher() -> None:
+    """Остановить фоновую запись и дописать оставшиеся изменения"""
+    task, _FlusherState.task = _FlusherState.task, None
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    try:
+        while await flush_stock():
+            pass
+    except Exception as e:
+        logger.warning("Final stock flush failed: %s", e)
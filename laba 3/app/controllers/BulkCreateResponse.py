@@ -0,0 +1,15 @@
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class BulkItemError(BaseModel):
+    index: int
+    error: str
+
+
+class BulkCreateResponse(BaseModel, Generic[T]):
+    created: list[T]
+    errors: list[BulkItemError]
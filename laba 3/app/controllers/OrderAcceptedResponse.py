@@ -0,0 +1,8 @@
+import uuid
+
+from pydantic import BaseModel
+
+
+class OrderAcceptedResponse(BaseModel):
+    tracking_id: uuid.UUID
+    status: str = "accepted"
@@ -0,0 +1,18 @@
+import datetime
+import uuid
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ProductStatsResponse(BaseModel):
+    product_id: uuid.UUID
+    orders_count: int
+    last_order_at: Optional[datetime.datetime] = None
+
+
+class UserStatsResponse(BaseModel):
+    user_id: uuid.UUID
+    orders_count: int
+    first_order_at: Optional[datetime.datetime] = None
+    last_order_at: Optional[datetime.datetime] = None
@@ -0,0 +1,26 @@
+from typing import Any, Optional
+
+from pydantic import model_serializer
+
+from .AddressResponse import AddressResponse
+from .OrderResponse import OrderResponse
+from .UserResponse import UserResponse
+
+
+class UserDetailsResponse(UserResponse):
+    """Пользователь со связями, запрошенными в include
+
+    Связи, которых не было в include, в ответ не попадают, а не приходят
+    как null.
+    """
+
+    addresses: Optional[list[AddressResponse]] = None
+    orders: Optional[list[OrderResponse]] = None
+
+    @model_serializer(mode="wrap")
+    def _omit_not_included(self, handler) -> dict[str, Any]:
+        data = handler(self)
+        for name in ("addresses", "orders"):
+            if name not in self.model_fields_set:
+                data.pop(name, None)
+        return data
@@ -1,13 +1,23 @@
+from typing import Any
 from uuid import UUID
 
-from litestar import delete, get, post, put
+from litestar import Request, Response, delete, get, post, put
 from litestar.controller import Controller
-from litestar.params import Body
+from litestar.params import Body, Parameter
 
 from ..DTO.AddressCreate import AddressCreate
 from ..models import Address
 from ..services.address_service import AddressService
 from .AddressResponse import AddressResponse
+from .bulk import bulk_create
+from .BulkCreateResponse import BulkCreateResponse
+from .pagination import (
+    MAX_PAGE_SIZE,
+    PAGE_RESPONSE_HEADERS,
+    ndjson_response,
+    page_response,
+    wants_ndjson,
+)
 
 
 class AddressController(Controller):
@@ -25,14 +35,25 @@ class AddressController(Controller):
             raise Exception(detail=f"Address with ID {address_id} not found")
         return self.map_address_to_response(address)
 
-    @get()
+    @get(response_headers=PAGE_RESPONSE_HEADERS)
     async def get_all_addresses(
         self,
+        request: Request,
         address_service: AddressService,
-    ) -> list[AddressResponse]:
-        """Получить все адреса"""
-        addresses = await address_service.get_by_filter()
-        return [self.map_address_to_response(address) for address in addresses]
+        cursor: str | None = None,
+        limit: int = Parameter(default=100, ge=1, le=MAX_PAGE_SIZE),
+    ) -> Response[list[AddressResponse]]:
+        """Получить все адреса постранично или потоком NDJSON"""
+        if wants_ndjson(request):
+            return ndjson_response(
+                address_service.stream_by_filter(cursor),
+                self.map_address_to_response,
+            )
+        addresses, next_cursor = await address_service.get_page(cursor, limit)
+        return page_response(
+            [self.map_address_to_response(address) for address in addresses],
+            next_cursor,
+        )
 
     @post("/")
     async def create_address(
@@ -44,6 +65,20 @@ class AddressController(Controller):
         address = await address_service.create(data)
         return self.map_address_to_response(address)
 
+    @post("/bulk")
+    async def create_addresses_bulk(
+        self,
+        address_service: AddressService,
+        data: list[dict[str, Any]] = Body(),
+    ) -> BulkCreateResponse[AddressResponse]:
+        """Добавить адреса пачкой в одной транзакции"""
+        return await bulk_create(
+            data,
+            AddressCreate,
+            address_service.create_many,
+            self.map_address_to_response,
+        )
+
     @delete("/{address_id:uuid}")
     async def delete_address(
         self,
@@ -0,0 +1,53 @@
+import os
+from typing import Any, Awaitable, Callable, TypeVar
+
+from litestar.exceptions import ValidationException
+from pydantic import BaseModel, ValidationError
+
+from ..repositories.bulk import BulkResult
+from .BulkCreateResponse import BulkCreateResponse, BulkItemError
+
+T = TypeVar("T", bound=BaseModel)
+
+MAX_BULK_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+async def bulk_create(
+    items: list[dict[str, Any]],
+    dto_type: type[BaseModel],
+    create_many: Callable[[list[Any]], Awaitable[BulkResult]],
+    mapper: Callable[[Any], T],
+) -> BulkCreateResponse[T]:
+    """Проверить элементы по DTO и вставить корректные одной транзакцией
+
+    Ошибки валидации и ошибки БД возвращаются с индексом во входном массиве.
+    """
+    if len(items) > MAX_BULK_ITEMS:
+        raise ValidationException(f"Too many items: {len(items)} > {MAX_BULK_ITEMS}")
+
+    valid: list[BaseModel] = []
+    positions: list[int] = []
+    errors: list[BulkItemError] = []
+    for index, raw in enumerate(items):
+        try:
+            valid.append(dto_type.model_validate(raw))
+            positions.append(index)
+        except ValidationError as e:
+            errors.append(BulkItemError(index=index, error=_validation_message(e)))
+
+    result = await create_many(valid)
+    errors.extend(
+        BulkItemError(index=positions[index], error=message)
+        for index, message in result.errors
+    )
+    errors.sort(key=lambda error: error.index)
+    return BulkCreateResponse(
+        created=[mapper(entity) for _, entity in result.created], errors=errors
+    )
@@ -0,0 +1,26 @@
+from typing import Any
+
+from litestar import get
+from litestar.controller import Controller
+
+from ..cache.entity_cache import negative_cache_stats, stampede_stats
+from ..cache.local_cache import local_cache_stats
+from ..database import get_pool_stats
+
+
+class MetricsController(Controller):
+    path = "/metrics"
+
+    @get("/db")
+    async def get_db_metrics(self) -> dict[str, Any]:
+        """Состояние пула соединений и время ожидания соединения"""
+        return get_pool_stats()
+
+    @get("/cache")
+    async def get_cache_metrics(self) -> dict[str, Any]:
+        """Счётчики L1-кэша, загрузок из БД при промахах и надгробий"""
+        return {
+            "l1": local_cache_stats(),
+            "stampede": stampede_stats.as_dict(),
+            "negative": negative_cache_stats.as_dict(),
+        }
@@ -1,12 +1,24 @@
+from typing import Any
 from uuid import UUID
 
-from litestar import delete, get, post, put
+from litestar import Request, Response, delete, get, post, put
 from litestar.controller import Controller
-from litestar.params import Body
+from litestar.params import Body, Parameter
 
 from ..DTO.OrderCreate import OrderCreate
+from ..rabbitmq.publisher import async_order_intake_enabled
 from ..services.order_service import OrderService
+from .bulk import bulk_create
+from .BulkCreateResponse import BulkCreateResponse
+from .OrderAcceptedResponse import OrderAcceptedResponse
 from .OrderResponse import OrderResponse
+from .pagination import (
+    MAX_PAGE_SIZE,
+    PAGE_RESPONSE_HEADERS,
+    ndjson_response,
+    page_response,
+    wants_ndjson,
+)
 
 
 class OrderController(Controller):
@@ -24,24 +36,50 @@ class OrderController(Controller):
             raise Exception(detail=f"Order with ID {order_id} not found")
         return self.map_order_to_response(order)
 
-    @get()
+    @get(response_headers=PAGE_RESPONSE_HEADERS)
     async def get_all_orders(
         self,
+        request: Request,
         order_service: OrderService,
-    ) -> list[OrderResponse]:
-        """Получить все заказы"""
-        orders = await order_service.get_by_filter()
-        return [self.map_order_to_response(order) for order in orders]
+        cursor: str | None = None,
+        limit: int = Parameter(default=100, ge=1, le=MAX_PAGE_SIZE),
+    ) -> Response[list[OrderResponse]]:
+        """Получить все заказы постранично или потоком NDJSON"""
+        if wants_ndjson(request):
+            return ndjson_response(
+                order_service.stream_by_filter(cursor),
+                self.map_order_to_response,
+            )
+        orders, next_cursor = await order_service.get_page(cursor, limit)
+        return page_response(
+            [self.map_order_to_response(order) for order in orders], next_cursor
+        )
 
     @post("/")
     async def create_order(
         self,
         order_service: OrderService,
         data: OrderCreate = Body(),
-    ) -> OrderResponse:
-        """Добавить заказ"""
+    ) -> Response[OrderResponse | OrderAcceptedResponse]:
+        """Добавить заказ; при ORDER_INTAKE_MODE=async - поставить в очередь"""
+        if async_order_intake_enabled():
+            tracking_id = await order_service.submit(data)
+            return Response(
+                OrderAcceptedResponse(tracking_id=tracking_id), status_code=202
+            )
         order = await order_service.create(data)
-        return self.map_order_to_response(order)
+        return Response(self.map_order_to_response(order), status_code=201)
+
+    @post("/bulk")
+    async def create_orders_bulk(
+        self,
+        order_service: OrderService,
+        data: list[dict[str, Any]] = Body(),
+    ) -> BulkCreateResponse[OrderResponse]:
+        """Добавить заказы пачкой в одной транзакции"""
+        return await bulk_create(
+            data, OrderCreate, order_service.create_many, self.map_order_to_response
+        )
 
     @delete("/{order_id:uuid}")
     async def delete_order(
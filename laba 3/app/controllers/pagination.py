@@ -0,0 +1,59 @@
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Sequence, TypeVar
+
+from litestar import Request, Response
+from litestar.background_tasks import BackgroundTask
+from litestar.datastructures import ResponseHeader
+from litestar.response import Stream
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 1000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+PAGE_RESPONSE_HEADERS = [
+    ResponseHeader(
+        name=NEXT_CURSOR_HEADER,
+        description="Курсор следующей страницы; отсутствует на последней",
+        documentation_only=True,
+    )
+]
+
+
+def page_response(items: list[T], next_cursor: str | None) -> Response[list[T]]:
+    """Ответ со страницей элементов и курсором следующей страницы в заголовке"""
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(content=items, headers=headers)
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_response(
+    batches: AsyncGenerator[Sequence[Any], None],
+    mapper: Callable[[Any], BaseModel],
+) -> Stream:
+    """Потоковый ответ NDJSON: каждая пачка строк уходит в сокет одним куском
+
+    Litestar бросает итератор потока, когда клиент отключается, поэтому
+    пачки закрываются фоновой задачей ответа: сессия с курсором сразу
+    возвращает соединение в пул, а не ждёт сборщика мусора.
+    """
+
+    async def encode() -> AsyncIterator[bytes]:
+        async with aclosing(batches):
+            async for batch in batches:
+                yield b"".join(
+                    mapper(item).model_dump_json().encode() + b"\n" for item in batch
+                )
+
+    # Обёртка нужна: BackgroundTask выполнил бы aclose в потоке, не дождавшись
+    async def close() -> None:
+        await batches.aclose()
+
+    return Stream(
+        encode(), media_type=NDJSON_MEDIA_TYPE, background=BackgroundTask(close)
+    )
@@ -1,11 +1,21 @@
+from typing import Any
 from uuid import UUID
 
-from litestar import delete, get, post, put
+from litestar import Request, Response, delete, get, post, put
 from litestar.controller import Controller
-from litestar.params import Body
+from litestar.params import Body, Parameter
 
 from ..DTO.ProductCreate import ProductCreate
 from ..services.product_service import ProductService
+from .bulk import bulk_create
+from .BulkCreateResponse import BulkCreateResponse
+from .pagination import (
+    MAX_PAGE_SIZE,
+    PAGE_RESPONSE_HEADERS,
+    ndjson_response,
+    page_response,
+    wants_ndjson,
+)
 from .ProductResponse import ProductResponse
 
 
@@ -24,14 +34,30 @@ class ProductController(Controller):
             raise Exception(detail=f"Product with ID {product_id} not found")
         return self.map_product_to_response(product)
 
-    @get()
+    @get(response_headers=PAGE_RESPONSE_HEADERS)
     async def get_all_products(
         self,
+        request: Request,
         product_service: ProductService,
-    ) -> list[ProductResponse]:
-        """Получить все продукты"""
-        products = await product_service.get_by_filter()
-        return [self.map_product_to_response(product) for product in products]
+        cursor: str | None = None,
+        limit: int = Parameter(default=100, ge=1, le=MAX_PAGE_SIZE),
+        ids: list[UUID] | None = Parameter(default=None, max_items=MAX_PAGE_SIZE),
+    ) -> Response[list[ProductResponse]]:
+        """Получить продукты постранично, потоком NDJSON или по списку ids"""
+        if ids:
+            products = await product_service.get_many(ids)
+            return page_response(
+                [self.map_product_to_response(product) for product in products], None
+            )
+        if wants_ndjson(request):
+            return ndjson_response(
+                product_service.stream_by_filter(cursor),
+                self.map_product_to_response,
+            )
+        products, next_cursor = await product_service.get_page(cursor, limit)
+        return page_response(
+            [self.map_product_to_response(product) for product in products], next_cursor
+        )
 
     @post("/")
     async def create_product(
@@ -43,6 +69,20 @@ class ProductController(Controller):
         product = await product_service.create(data)
         return self.map_product_to_response(product)
 
+    @post("/bulk")
+    async def create_products_bulk(
+        self,
+        product_service: ProductService,
+        data: list[dict[str, Any]] = Body(),
+    ) -> BulkCreateResponse[ProductResponse]:
+        """Добавить продукты пачкой в одной транзакции"""
+        return await bulk_create(
+            data,
+            ProductCreate,
+            product_service.create_many,
+            self.map_product_to_response,
+        )
+
     @delete("/{product_id:uuid}")
     async def delete_product(
         self,
@@ -0,0 +1,46 @@
+from litestar import get
+from litestar.controller import Controller
+from litestar.params import Parameter
+
+from ..services.stats_service import StatsService
+from .pagination import MAX_PAGE_SIZE
+from .StatsResponse import ProductStatsResponse, UserStatsResponse
+
+
+class StatsController(Controller):
+    path = "/stats"
+
+    @get("/products")
+    async def get_product_stats(
+        self,
+        stats_service: StatsService,
+        limit: int = Parameter(default=100, ge=1, le=MAX_PAGE_SIZE),
+    ) -> list[ProductStatsResponse]:
+        """Товары по числу заказов из сводной таблицы, самые продаваемые первыми"""
+        stats = await stats_service.get_product_stats(limit)
+        return [
+            ProductStatsResponse(
+                product_id=row.product_id,
+                orders_count=row.orders_count,
+                last_order_at=row.last_order_at,
+            )
+            for row in stats
+        ]
+
+    @get("/users")
+    async def get_user_stats(
+        self,
+        stats_service: StatsService,
+        limit: int = Parameter(default=100, ge=1, le=MAX_PAGE_SIZE),
+    ) -> list[UserStatsResponse]:
+        """Пользователи по числу заказов из сводной таблицы"""
+        stats = await stats_service.get_user_stats(limit)
+        return [
+            UserStatsResponse(
+                user_id=row.user_id,
+                orders_count=row.orders_count,
+                first_order_at=row.first_order_at,
+                last_order_at=row.last_order_at,
+            )
+            for row in stats
+        ]
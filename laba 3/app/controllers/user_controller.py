@@ -1,15 +1,51 @@
+from typing import Any
 from uuid import UUID
 
-from litestar import delete, get, post, put
+from litestar import Request, Response, delete, get, post, put
 from litestar.controller import Controller
-from litestar.params import Body
+from litestar.exceptions import ValidationException
+from litestar.params import Body, Parameter
 
 from ..DTO.UserCreate import UserCreate
 from ..DTO.UserUpdate import UserUpdate
 from ..models import User
+from ..repositories.user_repository import USER_RELATIONSHIPS
 from ..services.user_service import UserService
+from .AddressResponse import AddressResponse
+from .bulk import bulk_create
+from .BulkCreateResponse import BulkCreateResponse
+from .OrderResponse import OrderResponse
+from .pagination import (
+    MAX_PAGE_SIZE,
+    PAGE_RESPONSE_HEADERS,
+    ndjson_response,
+    page_response,
+    wants_ndjson,
+)
+from .UserDetailsResponse import UserDetailsResponse
 from .UserResponse import UserResponse
 
+INCLUDE_PARAMETER = Parameter(
+    default=None,
+    description="Связи через запятую: " + ",".join(USER_RELATIONSHIPS),
+)
+
+
+def parse_include(include: str | None) -> tuple[str, ...]:
+    """Разобрать ?include=addresses,orders; неизвестная связь - ошибка клиента"""
+    if not include:
+        return ()
+    names = tuple(dict.fromkeys(n.strip() for n in include.split(",") if n.strip()))
+    unknown = [name for name in names if name not in USER_RELATIONSHIPS]
+    if unknown:
+        raise ValidationException(f"Unknown include: {', '.join(unknown)}")
+    return names
+
+
+def include_kwargs(relationships: tuple[str, ...]) -> dict[str, tuple[str, ...]]:
+    # Без include сервис читает как раньше, в том числе через кэш
+    return {"include": relationships} if relationships else {}
+
 
 class UserController(Controller):
     path = "/users"
@@ -19,21 +55,48 @@ class UserController(Controller):
         self,
         user_service: UserService,
         user_id: UUID,
-    ) -> UserResponse:
-        """Получить пользователя по ID"""
-        user = await user_service.get_by_id(user_id)
+        include: str | None = INCLUDE_PARAMETER,
+    ) -> UserResponse | UserDetailsResponse:
+        """Получить пользователя по ID, при include - вместе со связями"""
+        relationships = parse_include(include)
+        user = await user_service.get_by_id(user_id, **include_kwargs(relationships))
         if not user:
             raise ValueError(f"User with ID {user_id} not found")
-        return self.map_user_to_response(user)
+        return self.map_user_to_response(user, relationships)
 
-    @get()
+    @get(response_headers=PAGE_RESPONSE_HEADERS)
     async def get_all_users(
         self,
+        request: Request,
         user_service: UserService,
-    ) -> list[UserResponse]:
-        """Получить всех пользователей"""
-        users = await user_service.get_by_filter()
-        return [self.map_user_to_response(user) for user in users]
+        cursor: str | None = None,
+        limit: int = Parameter(default=100, ge=1, le=MAX_PAGE_SIZE),
+        ids: list[UUID] | None = Parameter(default=None, max_items=MAX_PAGE_SIZE),
+        include: str | None = INCLUDE_PARAMETER,
+    ) -> Response[list[UserResponse | UserDetailsResponse]]:
+        """Получить пользователей постранично, потоком NDJSON или по списку ids
+
+        Связи из include загружаются одним запросом на связь для всей страницы.
+        """
+        relationships = parse_include(include)
+        if ids:
+            users = await user_service.get_many(ids, **include_kwargs(relationships))
+            return page_response(
+                [self.map_user_to_response(user, relationships) for user in users],
+                None,
+            )
+        if wants_ndjson(request):
+            return ndjson_response(
+                user_service.stream_by_filter(cursor, **include_kwargs(relationships)),
+                lambda user: self.map_user_to_response(user, relationships),
+            )
+        users, next_cursor = await user_service.get_page(
+            cursor, limit, **include_kwargs(relationships)
+        )
+        return page_response(
+            [self.map_user_to_response(user, relationships) for user in users],
+            next_cursor,
+        )
 
     @post("/")
     async def create_user(
@@ -45,6 +108,17 @@ class UserController(Controller):
         user = await user_service.create(data)
         return self.map_user_to_response(user)
 
+    @post("/bulk")
+    async def create_users_bulk(
+        self,
+        user_service: UserService,
+        data: list[dict[str, Any]] = Body(),
+    ) -> BulkCreateResponse[UserResponse]:
+        """Добавить пользователей пачкой в одной транзакции"""
+        return await bulk_create(
+            data, UserCreate, user_service.create_many, self.map_user_to_response
+        )
+
     @delete("/{user_id:uuid}")
     async def delete_user(
         self,
@@ -65,10 +139,41 @@ class UserController(Controller):
         updated = await user_service.update(user_id, data)
         return self.map_user_to_response(updated)
 
-    def map_user_to_response(self, user: User) -> UserResponse:
-        return UserResponse(
+    def map_user_to_response(
+        self, user: User, include: tuple[str, ...] = ()
+    ) -> UserResponse:
+        if not include:
+            return UserResponse(
+                id=user.id,
+                login=user.login,
+                email=user.email,
+                description=user.description or "",
+            )
+        # Обращаемся только к загруженным связям: ленивая загрузка в async
+        # недоступна
+        relations: dict[str, list] = {}
+        if "addresses" in include:
+            relations["addresses"] = [
+                AddressResponse(
+                    id=address.id, user_id=address.user_id, street=address.street
+                )
+                for address in user.addresses
+            ]
+        if "orders" in include:
+            relations["orders"] = [
+                OrderResponse(
+                    id=order.id,
+                    user_id=order.user_id,
+                    address_id=order.address_id,
+                    product_id=order.product_id,
+                    date=order.date,
+                )
+                for order in user.orders
+            ]
+        return UserDetailsResponse(
             id=user.id,
             login=user.login,
             email=user.email,
             description=user.description or "",
+            **relations,
         )
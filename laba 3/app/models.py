@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
@@ -13,13 +13,14 @@ class Base(AsyncAttrs, DeclarativeBase):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
 
     id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, unique=True, default=uuid4
+        UUID(as_uuid=True), primary_key=True, default=uuid4
     )
     login: Mapped[str] = mapped_column(String(40), unique=True, nullable=False)
     email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
-    description: Mapped[str] = mapped_column(String(255), unique=True, nullable=True)
+    description: Mapped[str] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.now)
     updated_at: Mapped[datetime] = mapped_column(default=datetime.now)
 
@@ -29,9 +30,10 @@ class User(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (Index("ix_products_created_at_id", "created_at", "id"),)
 
     id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, unique=True, default=uuid4
+        UUID(as_uuid=True), primary_key=True, default=uuid4
     )
     name: Mapped[str] = mapped_column(String(40), unique=True, nullable=False)
     quantity: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -43,9 +45,15 @@ class Product(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_orders_product_id", "product_id"),
+        Index("ix_orders_address_id", "address_id"),
+    )
 
     id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, unique=True, default=uuid4
+        UUID(as_uuid=True), primary_key=True, default=uuid4
     )
     date: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     user_id: Mapped[UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -61,9 +69,13 @@ class Order(Base):
 
 class Address(Base):
     __tablename__ = "addresses"
+    __table_args__ = (
+        Index("ix_addresses_created_at_id", "created_at", "id"),
+        Index("ix_addresses_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
     id: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, unique=True, default=uuid4
+        UUID(as_uuid=True), primary_key=True, default=uuid4
     )
     user_id: Mapped[UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
     street: Mapped[str] = mapped_column(nullable=False)
@@ -72,3 +84,42 @@ class Address(Base):
 
     user = relationship("User", back_populates="addresses")
     orders = relationship("Order", back_populates="address")
+
+
+class ProductSalesStats(Base):
+    __tablename__ = "product_sales_stats"
+    __table_args__ = (Index("ix_product_sales_stats_orders_count", "orders_count"),)
+
+    product_id: Mapped[UUID] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    orders_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_order_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+class UserOrderStats(Base):
+    __tablename__ = "user_order_stats"
+    __table_args__ = (Index("ix_user_order_stats_orders_count", "orders_count"),)
+
+    user_id: Mapped[UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    orders_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    first_order_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    last_order_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+class ProcessedMessage(Base):
+    # Сообщения RabbitMQ, изменения которых уже зафиксированы
+    __tablename__ = "processed_messages"
+    __table_args__ = (Index("ix_processed_messages_processed_at", "processed_at"),)
+
+    queue: Mapped[str] = mapped_column(String(64), primary_key=True)
+    message_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    processed_at: Mapped[datetime] = mapped_column(default=datetime.now)
@@ -0,0 +1,101 @@
+import os
+from typing import Iterable
+
+from ..cache.redis_client import get_redis
+from .retry import RetryLaterError
+
+# Claim-then-commit idempotency by message_id:
+#   SET msg:<queue>:<id> pending NX EX RABBITMQ_CLAIM_TTL GET
+# claims the message atomically; after the DB commit the key becomes "done"
+# for RABBITMQ_DEDUP_TTL, and a failed attempt deletes the claim, so the
+# retry can claim it again. A claim left by a crashed consumer expires.
+# This is only the fast path: the authoritative record is processed_messages,
+# written in the transaction that applies the message (see consumer.py).
+DEDUP_PREFIX = "msg:"
+RABBITMQ_DEDUP_TTL = int(os.getenv("RABBITMQ_DEDUP_TTL", "86400"))
+RABBITMQ_CLAIM_TTL = int(os.getenv("RABBITMQ_CLAIM_TTL", "60"))
+
+NEW = "new"
+DUPLICATE = "duplicate"
+IN_FLIGHT = "in_flight"
+
+_PENDING = "pending"
+_DONE = "done"
+
+
+class MessageInFlightError(RetryLaterError):
+    """Another consumer holds the claim, or held it and crashed"""
+
+
+class Deduplicator:
+    """Idempotency keys of one queue's messages in Redis
+
+    Messages without a message_id, and every message while Redis is
+    unavailable, are processed as new.
+    """
+
+    def __init__(self, queue_name: str):
+        self.queue_name = queue_name
+
+    def _key(self, message_id: str) -> str:
+        return f"{DEDUP_PREFIX}{self.queue_name}:{message_id}"
+
+    async def claim(self, message_ids: list[str | None]) -> list[str]:
+        """Claim messages in one round trip; NEW, DUPLICATE or IN_FLIGHT each"""
+        redis = get_redis()
+        ids = [message_id for message_id in message_ids if message_id]
+        if redis is None or not ids:
+            return [NEW] * len(message_ids)
+        pipe = redis.pipeline(transaction=False)
+        for message_id in ids:
+            pipe.set(
+                self._key(message_id),
+                _PENDING,
+                nx=True,
+                ex=RABBITMQ_CLAIM_TTL,
+                get=True,
+            )
+        try:
+            previous = iter(await pipe.execute())
+        except Exception as e:
+            print(f"{self.queue_name} dedup claim failed, processing as new:", e)
+            return [NEW] * len(message_ids)
+
+        statuses = []
+        for message_id in message_ids:
+            state = next(previous) if message_id else None
+            if isinstance(state, bytes):
+                state = state.decode()
+            if state is None:
+                statuses.append(NEW)
+            elif state == _DONE:
+                statuses.append(DUPLICATE)
+            else:
+                statuses.append(IN_FLIGHT)
+        return statuses
+
+    async def _update(self, message_ids: Iterable[str | None], done: bool) -> None:
+        redis = get_redis()
+        keys = [self._key(message_id) for message_id in message_ids if message_id]
+        if redis is None or not keys:
+            return
+        pipe = redis.pipeline(transaction=False)
+        for key in keys:
+            if done:
+                pipe.set(key, _DONE, ex=RABBITMQ_DEDUP_TTL)
+            else:
+                pipe.delete(key)
+        try:
+            await pipe.execute()
+        except Exception as e:
+            # An unmarked message is claimed again after RABBITMQ_CLAIM_TTL
+            # and then skipped by processed_messages
+            print(f"{self.queue_name} dedup update failed:", e)
+
+    async def mark_done(self, message_ids: Iterable[str | None]) -> None:
+        """Remember committed messages so redeliveries are only acked"""
+        await self._update(message_ids, done=True)
+
+    async def release(self, message_ids: Iterable[str | None]) -> None:
+        """Drop the claims of messages whose processing failed"""
+        await self._update(message_ids, done=False)
@@ -0,0 +1,95 @@
+from datetime import datetime
+from typing import Any, TypeVar, Union
+from uuid import UUID
+
+import msgspec
+
+# Typed consumer payloads. The "action" field selects the message type,
+# and one decoder pass validates the whole payload (UUIDs, datetimes, ints).
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+class ProductData(msgspec.Struct):
+    name: str
+    quantity: int
+
+
+class CreateProduct(msgspec.Struct, tag_field="action", tag="create"):
+    product: ProductData
+
+
+class UpdateProduct(msgspec.Struct, tag_field="action", tag="update"):
+    product_id: UUID
+    product: ProductData
+
+
+class MarkOutOfStock(msgspec.Struct, tag_field="action", tag="mark_out_of_stock"):
+    product_id: UUID
+
+
+class UpsertProducts(msgspec.Struct, tag_field="action", tag="upsert"):
+    # Catalog sync: a single product or an array of them
+    product: ProductData | None = None
+    products: list[ProductData] = []
+
+    def items(self) -> list[ProductData]:
+        return self.products or ([self.product] if self.product else [])
+
+
+ProductMessage = Union[CreateProduct, UpdateProduct, MarkOutOfStock, UpsertProducts]
+
+
+class OrderItem(msgspec.Struct):
+    product_id: UUID
+    quantity: int = 1
+
+
+class OrderData(msgspec.Struct):
+    user_id: UUID
+    address_id: UUID
+    date: datetime
+    products: list[OrderItem] = []
+    # Tracking id returned to the client; becomes the id of the first order row
+    id: UUID | None = None
+
+
+class CreateOrder(msgspec.Struct, tag_field="action", tag="create"):
+    order: OrderData
+
+
+class UpdateOrderStatus(msgspec.Struct, tag_field="action", tag="update_status"):
+    order_id: UUID
+    order: dict[str, Any] = {}
+
+
+OrderMessage = Union[CreateOrder, UpdateOrderStatus]
+
+T = TypeVar("T")
+
+_json_decoders = {
+    ProductMessage: msgspec.json.Decoder(ProductMessage),
+    OrderMessage: msgspec.json.Decoder(OrderMessage),
+}
+_msgpack_decoders = {
+    ProductMessage: msgspec.msgpack.Decoder(ProductMessage),
+    OrderMessage: msgspec.msgpack.Decoder(OrderMessage),
+}
+
+
+def decode_message(body: bytes, content_type: str | None, schema: type[T]) -> T:
+    """Decode and validate a payload; msgpack when content_type says so
+
+    Raises msgspec.DecodeError for broken payloads and its subclass
+    msgspec.ValidationError for ones that do not match the schema.
+    """
+    if content_type in MSGPACK_CONTENT_TYPES:
+        return _msgpack_decoders[schema].decode(body)
+    return _json_decoders[schema].decode(body)
+
+
+def encode_message(message: Any, content_type: str = JSON_CONTENT_TYPE) -> bytes:
+    if content_type in MSGPACK_CONTENT_TYPES:
+        return msgspec.msgpack.encode(message)
+    return msgspec.json.encode(message)
@@ -0,0 +1,186 @@
+import asyncio
+import os
+from uuid import UUID, uuid4
+
+try:
+    import aio_pika
+    from aio_pika.pool import Pool
+except Exception:  # pragma: no cover - aio_pika may not be installed in test env
+    aio_pika = None
+    Pool = None
+
+from ..DTO.OrderCreate import OrderCreate
+from .consumer import RABBIT_URL
+from .messages import (
+    JSON_CONTENT_TYPE,
+    CreateOrder,
+    OrderData,
+    OrderItem,
+    encode_message,
+)
+
+# "sync" - POST /orders writes to the DB, "async" - it publishes the order
+# to the orders queue and returns 202 with a tracking id
+ORDER_INTAKE_MODE = os.getenv("ORDER_INTAKE_MODE", "sync")
+# Confirm-mode channels shared by all requests of the process
+RABBITMQ_PUBLISH_CHANNELS = int(os.getenv("RABBITMQ_PUBLISH_CHANNELS", "4"))
+# Concurrent publishes sent together and confirmed by the broker at once
+RABBITMQ_PUBLISH_BATCH = int(os.getenv("RABBITMQ_PUBLISH_BATCH", "100"))
+RABBITMQ_PUBLISH_WINDOW_MS = float(os.getenv("RABBITMQ_PUBLISH_WINDOW_MS", "5"))
+RABBITMQ_PUBLISH_TIMEOUT = float(os.getenv("RABBITMQ_PUBLISH_TIMEOUT", "5"))
+
+
+class PublisherUnavailableError(RuntimeError):
+    """The message could not be handed over to RabbitMQ"""
+
+
+def async_order_intake_enabled() -> bool:
+    return ORDER_INTAKE_MODE == "async"
+
+
+class Publisher:
+    """Publishes through a pool of confirm-mode channels
+
+    Concurrent publish() calls are collected into batches of up to
+    `batch_size` messages or `window` seconds. A batch goes out on one pooled
+    channel without waiting between messages, so the broker confirms it
+    with a few multiple=True acks instead of a round trip per message.
+    """
+
+    def __init__(self, channels: "Pool", batch_size: int, window: float):
+        self._channels = channels
+        self.batch_size = batch_size
+        self.window = window
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._sending: set[asyncio.Task] = set()
+
+    async def publish(self, routing_key: str, message: "aio_pika.Message") -> None:
+        """Resolves once the broker has confirmed the message"""
+        confirmed = asyncio.get_running_loop().create_future()
+        await self._queue.put((routing_key, message, confirmed))
+        await confirmed
+
+    async def _collect(self) -> list[tuple]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.window
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self) -> None:
+        while True:
+            batch = await self._collect()
+            # Batches wait for a free channel, not for each other
+            task = asyncio.create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _send(self, batch: list[tuple]) -> None:
+        try:
+            async with self._channels.acquire() as channel:
+                results = await asyncio.gather(
+                    *(
+                        channel.default_exchange.publish(
+                            message, routing_key, timeout=RABBITMQ_PUBLISH_TIMEOUT
+                        )
+                        for routing_key, message, _ in batch
+                    ),
+                    return_exceptions=True,
+                )
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, _, confirmed), result in zip(batch, results):
+            if confirmed.done():
+                continue
+            if isinstance(result, BaseException):
+                confirmed.set_exception(PublisherUnavailableError(str(result)))
+            else:
+                confirmed.set_result(None)
+
+    async def drain(self) -> None:
+        """Wait until every accepted message is confirmed or failed"""
+        await self._queue.join()
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+
+
+class _PublisherState:
+    connection = None
+    channels: "Pool | None" = None
+    publisher: Publisher | None = None
+    task: asyncio.Task | None = None
+
+
+async def start_publisher() -> None:
+    """Open the publisher connection when orders are taken asynchronously"""
+    if not async_order_intake_enabled() or _PublisherState.publisher is not None:
+        return
+    if aio_pika is None:
+        print("aio_pika is not installed; asynchronous order intake is disabled")
+        return
+    try:
+        connection = await aio_pika.connect_robust(RABBIT_URL)
+        async with connection.channel() as channel:
+            await channel.declare_queue("orders", durable=True)
+    except Exception as e:
+        print("Failed to connect to RabbitMQ:", e)
+        return
+
+    async def open_channel():
+        # Unroutable messages fail the publish instead of vanishing
+        return await connection.channel(publisher_confirms=True, on_return_raises=True)
+
+    _PublisherState.connection = connection
+    _PublisherState.channels = Pool(open_channel, max_size=RABBITMQ_PUBLISH_CHANNELS)
+    _PublisherState.publisher = Publisher(
+        _PublisherState.channels,
+        RABBITMQ_PUBLISH_BATCH,
+        RABBITMQ_PUBLISH_WINDOW_MS / 1000,
+    )
+    _PublisherState.task = asyncio.create_task(_PublisherState.publisher.run())
+
+
+async def stop_publisher() -> None:
+    publisher, _PublisherState.publisher = _PublisherState.publisher, None
+    if publisher is None:
+        return
+    await publisher.drain()
+    _PublisherState.task.cancel()
+    await _PublisherState.channels.close()
+    await _PublisherState.connection.close()
+
+
+async def publish_order(order: OrderCreate) -> UUID:
+    """Queue an order for the orders consumer; returns its tracking id"""
+    publisher = _PublisherState.publisher
+    if publisher is None:
+        raise PublisherUnavailableError("RabbitMQ publisher is not connected")
+    tracking_id = uuid4()
+    payload = CreateOrder(
+        order=OrderData(
+            user_id=order.user_id,
+            address_id=order.address_id,
+            date=order.date,
+            products=[OrderItem(product_id=order.product_id)],
+            id=tracking_id,
+        )
+    )
+    await publisher.publish(
+        "orders",
+        aio_pika.Message(
+            encode_message(payload),
+            content_type=JSON_CONTENT_TYPE,
+            message_id=str(tracking_id),
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        ),
+    )
+    return tracking_id
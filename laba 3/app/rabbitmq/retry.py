@@ -0,0 +1,98 @@
+import os
+from typing import Any
+
+try:
+    import aio_pika
+except Exception:  # pragma: no cover - aio_pika may not be installed in test env
+    aio_pika = None
+
+import msgspec
+
+# Failed messages wait in "<queue>.retry.<attempt>" for
+# RABBITMQ_RETRY_DELAY_MS * 2 ** (attempt - 1) and are dead-lettered back to
+# the main queue; after RABBITMQ_MAX_RETRIES they are parked in "<queue>.dead"
+RABBITMQ_MAX_RETRIES = int(os.getenv("RABBITMQ_MAX_RETRIES", "5"))
+RABBITMQ_RETRY_DELAY_MS = int(os.getenv("RABBITMQ_RETRY_DELAY_MS", "1000"))
+
+RETRY_HEADER = "x-retry-count"
+ERROR_HEADER = "x-last-error"
+
+# Malformed payloads and business rejections (out of stock, missing product)
+# would fail the same way again, so they skip the retries
+PERMANENT_ERRORS = (ValueError, msgspec.DecodeError)
+
+
+class RetryLaterError(RuntimeError):
+    """Not a failure of the message itself: delay it without using an attempt"""
+
+
+def retry_queue_name(queue_name: str, attempt: int) -> str:
+    return f"{queue_name}.retry.{attempt}"
+
+
+def dead_letter_queue_name(queue_name: str) -> str:
+    return f"{queue_name}.dead"
+
+
+def retry_delay_ms(attempt: int) -> int:
+    return RABBITMQ_RETRY_DELAY_MS * 2 ** (attempt - 1)
+
+
+def retry_route(
+    queue_name: str, headers: dict[str, Any] | None, error: Exception
+) -> tuple[str, int]:
+    """Where a failed message goes next and its attempt number"""
+    retries = int((headers or {}).get(RETRY_HEADER, 0))
+    if isinstance(error, RetryLaterError) and RABBITMQ_MAX_RETRIES:
+        delay_level = min(max(retries, 1), RABBITMQ_MAX_RETRIES)
+        return retry_queue_name(queue_name, delay_level), retries
+    attempt = retries + 1
+    if isinstance(error, PERMANENT_ERRORS) or attempt > RABBITMQ_MAX_RETRIES:
+        return dead_letter_queue_name(queue_name), attempt
+    return retry_queue_name(queue_name, attempt), attempt
+
+
+class RetryQueues:
+    """Delayed-retry and dead-letter queues of one consumer queue"""
+
+    def __init__(self, channel, queue_name: str):
+        self.channel = channel
+        self.queue_name = queue_name
+
+    async def declare(self) -> None:
+        for attempt in range(1, RABBITMQ_MAX_RETRIES + 1):
+            await self.channel.declare_queue(
+                retry_queue_name(self.queue_name, attempt),
+                durable=True,
+                arguments={
+                    "x-message-ttl": retry_delay_ms(attempt),
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": self.queue_name,
+                },
+            )
+        await self.channel.declare_queue(
+            dead_letter_queue_name(self.queue_name), durable=True
+        )
+
+    async def fail(self, message: "aio_pika.IncomingMessage", error: Exception):
+        """Park a failed message for a delayed retry or in the dead-letter queue
+
+        The caller acks the original only after this publish is confirmed.
+        """
+        routing_key, attempt = retry_route(self.queue_name, message.headers, error)
+        print(f"{self.queue_name} message failed (attempt {attempt}):", error)
+        await self.channel.default_exchange.publish(
+            aio_pika.Message(
+                body=message.body,
+                content_type=message.content_type,
+                # Keeps the idempotency key of the retried copy
+                message_id=message.message_id,
+                headers={
+                    **(message.headers or {}),
+                    RETRY_HEADER: attempt,
+                    ERROR_HEADER: str(error)[:500],
+                },
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=routing_key,
+        )
@@ -0,0 +1,75 @@
+"""Standalone RabbitMQ consumers, started with python -m app.rabbitmq [--workers N]
+
+Each worker is a separate process with its own event loop, DB engine,
+Redis pool and AMQP connection. SIGTERM/SIGINT stops the deliveries and
+waits for in-flight messages before the process exits.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+
+RABBITMQ_CONSUMER_PROCESSES = int(os.getenv("RABBITMQ_CONSUMER_PROCESSES", "1"))
+
+
+async def _serve() -> None:
+    # Imported in the worker, so every process creates its own engine
+    from ..cache.redis_client import close_redis, init_redis
+    from ..database import engine
+    from .consumer import run_consumers
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    await init_redis()
+    try:
+        await run_consumers(stop)
+    finally:
+        await close_redis()
+        await engine.dispose()
+
+
+def _worker() -> None:
+    asyncio.run(_serve())
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.rabbitmq", description="Run RabbitMQ consumers"
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=RABBITMQ_CONSUMER_PROCESSES,
+        help="number of consumer processes (RABBITMQ_CONSUMER_PROCESSES)",
+    )
+    args = parser.parse_args(argv)
+    if args.workers <= 1:
+        _worker()
+        return 0
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_worker, name=f"consumer-{n}")
+        for n in range(args.workers)
+    ]
+
+    def shutdown(signum, _frame) -> None:
+        # Workers drain on SIGTERM; the parent just waits for them
+        for process in processes:
+            if process.pid is not None and process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    # exitcode is negative for a worker killed by a signal
+    return 1 if any(process.exitcode for process in processes) else 0
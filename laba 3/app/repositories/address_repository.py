@@ -1,11 +1,15 @@
 from datetime import datetime
+from typing import AsyncIterator, Sequence
 from uuid import UUID
 
-from sqlalchemy import delete, select
+from sqlalchemy import delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..DTO.AddressCreate import AddressCreate
 from ..models import Address
+from .base import update_returning
+from .bulk import BulkResult, insert_many
+from .pagination import fetch_page, stream_batches
 
 
 class AddressRepository:
@@ -26,31 +30,37 @@ class AddressRepository:
 
         return result.scalars().all()
 
+    async def get_page(
+        self, cursor: str | None = None, limit: int = 100, **filters
+    ) -> tuple[list[Address], str | None]:
+        return await fetch_page(self.session, Address, cursor, limit, **filters)
+
+    def stream_by_filters(
+        self, cursor: str | None = None, **filters
+    ) -> AsyncIterator[Sequence[Address]]:
+        return stream_batches(self.session, Address, cursor, **filters)
+
     async def create(self, data: AddressCreate) -> Address:
-        address = Address(**data.model_dump())
-        self.session.add(address)
-        await self.session.flush()
+        result = await self.session.execute(
+            insert(Address).values(**data.model_dump()).returning(Address)
+        )
+        address = result.scalar_one()
         await self.session.commit()
-        await self.session.refresh(address)
         return address
 
-    async def update(self, id: UUID, address_update: AddressCreate) -> Address:
-        result = await self.session.execute(select(Address).where(Address.id == id))
-        address = result.scalar_one_or_none()
-        if not address:
-            raise Exception("Where is no entity with same Id")
-
-        if address_update.user_id is not None:
-            address.user_id = address_update.user_id
-
-        if address_update.street is not None and address_update.street != "":
-            address.street = address_update.street
-
-        address.updated_at = datetime.now()
+    async def create_many(self, items: list[AddressCreate]) -> BulkResult:
+        return await insert_many(
+            self.session, Address, [item.model_dump() for item in items]
+        )
 
-        await self.session.commit()
-        await self.session.refresh(address)
-        return address
+    async def update(self, id: UUID, address_update: AddressCreate) -> Address:
+        values = {
+            field: value
+            for field, value in address_update.model_dump(exclude_unset=True).items()
+            if value is not None and value != ""
+        }
+        values["updated_at"] = datetime.now()
+        return await update_returning(self.session, Address, id, values)
 
     async def delete(self, id: UUID) -> None:
         await self.session.execute(delete(Address).where(Address.id == id))
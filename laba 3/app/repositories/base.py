@@ -0,0 +1,34 @@
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def update_returning(
+    session: AsyncSession,
+    model: Any,
+    id: UUID,
+    values: dict[str, Any],
+    commit: bool = True,
+) -> Any:
+    """Частичное обновление одним UPDATE ... RETURNING вместо SELECT + refresh
+
+    С commit=False транзакцию фиксирует вызывающий код (пакетная обработка).
+    """
+    if not values:
+        entity = await session.get(model, id)
+    else:
+        result = await session.execute(
+            update(model)
+            .where(model.id == id)
+            .values(**values)
+            .returning(model)
+            .execution_options(populate_existing=True)
+        )
+        entity = result.scalar_one_or_none()
+        if commit:
+            await session.commit()
+    if not entity:
+        raise Exception("Where is no entity with same Id")
+    return entity
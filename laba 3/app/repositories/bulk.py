@@ -0,0 +1,64 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@dataclass
+class BulkResult:
+    """Итог массовой вставки: позиции созданных строк и ошибок во входном списке"""
+
+    created: list[tuple[int, Any]] = field(default_factory=list)
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+
+# Ошибки, за которые отвечает сама строка: нарушенное ограничение или
+# значение, не подходящее столбцу (например, слишком длинная строка)
+_ROW_ERRORS = (IntegrityError, DataError)
+
+
+def _error_message(error: DBAPIError) -> str:
+    return str(error.orig).strip().splitlines()[0]
+
+
+async def insert_many(
+    session: AsyncSession, model: Any, rows: list[dict[str, Any]]
+) -> BulkResult:
+    """Вставить строки многострочным INSERT ... RETURNING в одной транзакции
+
+    Если пачка отклонена из-за строки, она делится пополам и каждая половина
+    вставляется в своём SAVEPOINT, пока ошибка не сведётся к одной строке:
+    для неё возвращается ошибка, остальные строки сохраняются. Несколько
+    плохих строк стоят порядка log(n) запросов каждая, а не n запросов.
+    """
+    result = BulkResult()
+    if rows:
+        await _insert_chunk(session, model, rows, 0, result)
+    await session.commit()
+    return result
+
+
+async def _insert_chunk(
+    session: AsyncSession,
+    model: Any,
+    rows: list[dict[str, Any]],
+    offset: int,
+    result: BulkResult,
+) -> None:
+    statement = insert(model).returning(model, sort_by_parameter_order=True)
+    try:
+        async with session.begin_nested():
+            entities = (await session.execute(statement, rows)).scalars().all()
+    except _ROW_ERRORS as e:
+        if len(rows) == 1:
+            result.errors.append((offset, _error_message(e)))
+            return
+        middle = len(rows) // 2
+        await _insert_chunk(session, model, rows[:middle], offset, result)
+        await _insert_chunk(session, model, rows[middle:], offset + middle, result)
+        return
+    result.created.extend(
+        (offset + index, entity) for index, entity in enumerate(entities)
+    )
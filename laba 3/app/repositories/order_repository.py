@@ -1,11 +1,15 @@
 from datetime import datetime
+from typing import AsyncIterator, Sequence
 from uuid import UUID
 
-from sqlalchemy import delete, select
+from sqlalchemy import delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..DTO.OrderCreate import OrderCreate
 from ..models import Order
+from .base import update_returning
+from .bulk import BulkResult, insert_many
+from .pagination import fetch_page, stream_batches
 
 
 class OrderRepository:
@@ -26,37 +30,52 @@ class OrderRepository:
 
         return result.scalars().all()
 
+    async def get_page(
+        self, cursor: str | None = None, limit: int = 100, **filters
+    ) -> tuple[list[Order], str | None]:
+        return await fetch_page(self.session, Order, cursor, limit, **filters)
+
+    def stream_by_filters(
+        self, cursor: str | None = None, **filters
+    ) -> AsyncIterator[Sequence[Order]]:
+        return stream_batches(self.session, Order, cursor, **filters)
+
     async def create(self, data: OrderCreate) -> Order:
-        order = Order(**data.model_dump())
-        self.session.add(order)
-        await self.session.flush()
+        result = await self.session.execute(
+            insert(Order).values(**data.model_dump()).returning(Order)
+        )
+        order = result.scalar_one()
         await self.session.commit()
-        await self.session.refresh(order)
         return order
 
-    async def update(self, id: UUID, order_update: OrderCreate) -> Order:
-        result = await self.session.execute(select(Order).where(Order.id == id))
-        order = result.scalar_one_or_none()
-        if not order:
-            raise Exception("Where is no entity with same Id")
-
-        if order_update.date is not None:
-            order.date = order_update.date
-
-        if order_update.user_id is not None:
-            order.user_id = order_update.user_id
-
-        if order_update.address_id is not None:
-            order.address_id = order_update.address_id
+    async def add_many(
+        self, items: list[OrderCreate], ids: list[UUID] | None = None
+    ) -> list[Order]:
+        """Вставить заказы одним INSERT; ids задают их первичные ключи"""
+        if not items:
+            return []
+        rows = [item.model_dump() for item in items]
+        if ids is not None:
+            rows = [{**row, "id": id} for row, id in zip(rows, ids)]
+        result = await self.session.execute(
+            insert(Order).returning(Order, sort_by_parameter_order=True), rows
+        )
 
-        if order_update.product_id is not None:
-            order.product_id = order_update.product_id
+        return result.scalars().all()
 
-        order.updated_at = datetime.now()
+    async def create_many(self, items: list[OrderCreate]) -> BulkResult:
+        return await insert_many(
+            self.session, Order, [item.model_dump() for item in items]
+        )
 
-        await self.session.commit()
-        await self.session.refresh(order)
-        return order
+    async def update(self, id: UUID, order_update: OrderCreate) -> Order:
+        values = {
+            field: value
+            for field, value in order_update.model_dump(exclude_unset=True).items()
+            if value is not None
+        }
+        values["updated_at"] = datetime.now()
+        return await update_returning(self.session, Order, id, values)
 
     async def delete(self, id: UUID) -> None:
         await self.session.execute(delete(Order).where(Order.id == id))
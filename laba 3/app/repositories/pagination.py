@@ -0,0 +1,90 @@
+import base64
+import binascii
+import json
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Sequence
+from uuid import UUID
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+
+class InvalidCursorError(ValueError):
+    """Курсор пагинации не удалось разобрать"""
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    """Упаковать позицию (created_at, id) в непрозрачную строку"""
+    raw = json.dumps([created_at.isoformat(), str(id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), UUID(id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_select(
+    model: Any, cursor: str | None = None, options: Sequence[Any] = (), **filters
+) -> Select:
+    """Запрос, упорядоченный по (created_at, id) и начинающийся после курсора"""
+    statement = select(model).options(*options).filter_by(**filters)
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(model.created_at, model.id) > tuple_(created_at, id)
+        )
+    return statement.order_by(model.created_at, model.id)
+
+
+async def fetch_page(
+    session: AsyncSession,
+    model: Any,
+    cursor: str | None = None,
+    limit: int = 100,
+    options: Sequence[Any] = (),
+    **filters,
+) -> tuple[Sequence[Any], str | None]:
+    """Страница по ключу (keyset): стоимость не зависит от глубины
+
+    Возвращает элементы и курсор следующей страницы (None, если она пуста).
+    """
+    result = await session.execute(
+        keyset_select(model, cursor, options, **filters).limit(limit + 1)
+    )
+    items = result.scalars().all()
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_cursor(last.created_at, last.id)
+
+
+async def stream_batches(
+    session: AsyncSession,
+    model: Any,
+    cursor: str | None = None,
+    options: Sequence[Any] = (),
+    **filters,
+) -> AsyncIterator[Sequence[Any]]:
+    """Читать строки серверным курсором пачками по STREAM_BATCH_SIZE
+
+    Поток читается уже после того, как обработчик вернул ответ и зависимости
+    очищены, поэтому по окончании сессия закрывается здесь же.
+    """
+    statement = keyset_select(model, cursor, options, **filters).execution_options(
+        yield_per=STREAM_BATCH_SIZE
+    )
+    try:
+        result = await session.stream(statement)
+        async for batch in result.scalars().partitions():
+            yield batch
+    finally:
+        await session.close()
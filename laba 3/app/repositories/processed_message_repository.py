@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import ProcessedMessage
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class ProcessedMessageRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, queue: str, message_ids: list[str | None]) -> list[bool]:
+        """Записать ID сообщений в текущей транзакции; True - сообщение новое
+
+        Фиксирует вызывающий код вместе с результатом обработки, поэтому
+        сообщение, однажды зафиксированное, повторно не применяется.
+        Транзакция с тем же ID ждёт фиксации или отката параллельной.
+        Сообщения без ID всегда новые, повтор ID в пачке - нет.
+        """
+        ids = sorted({message_id for message_id in message_ids if message_id})
+        added: set[str] = set()
+        if ids:
+            now = datetime.now()
+            insert_ = _UPSERT_INSERTS[self.session.get_bind().dialect.name]
+            result = await self.session.execute(
+                insert_(ProcessedMessage)
+                .values(
+                    [
+                        {"queue": queue, "message_id": id, "processed_at": now}
+                        for id in ids
+                    ]
+                )
+                .on_conflict_do_nothing()
+                .returning(ProcessedMessage.message_id)
+            )
+            added = set(result.scalars())
+
+        fresh = []
+        for message_id in message_ids:
+            fresh.append(not message_id or message_id in added)
+            added.discard(message_id)
+        return fresh
+
+    async def purge(self, older_than: datetime) -> int:
+        """Удалить записи старше older_than; возвращает число удалённых"""
+        result = await self.session.execute(
+            delete(ProcessedMessage).where(ProcessedMessage.processed_at < older_than)
+        )
+        await self.session.commit()
+        return result.rowcount
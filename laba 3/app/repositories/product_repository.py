@@ -1,10 +1,22 @@
+import os
+from datetime import datetime
+from typing import AsyncIterator, Sequence
 from uuid import UUID
 
-from sqlalchemy import delete, select
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..DTO.ProductCreate import ProductCreate
 from ..models import Product
+from .base import update_returning
+from .bulk import BulkResult, insert_many
+from .pagination import fetch_page, stream_batches
+
+# Строк в одном INSERT ... ON CONFLICT: держит число параметров в пределах
+UPSERT_CHUNK_SIZE = int(os.getenv("UPSERT_CHUNK_SIZE", "1000"))
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
 
 
 class ProductRepository:
@@ -16,6 +28,37 @@ class ProductRepository:
 
         return result.scalars().one_or_none()
 
+    async def get_by_ids(self, ids: list[UUID]) -> list[Product]:
+        if not ids:
+            return []
+        result = await self.session.execute(select(Product).where(Product.id.in_(ids)))
+
+        return result.scalars().all()
+
+    async def lock_stock(self, ids: list[UUID]) -> dict[UUID, int]:
+        # Rows are locked in id order so concurrent orders cannot deadlock
+        result = await self.session.execute(
+            select(Product.id, Product.quantity)
+            .where(Product.id.in_(ids))
+            .order_by(Product.id)
+            .with_for_update()
+        )
+
+        return dict(result.tuples().all())
+
+    async def set_quantities(self, quantities: dict[UUID, int]) -> None:
+        if not quantities:
+            return
+        await self.session.execute(
+            update(Product)
+            .where(Product.id.in_(quantities))
+            .values(
+                quantity=case(quantities, value=Product.id),
+                updated_at=datetime.now(),
+            )
+            .execution_options(synchronize_session="fetch")
+        )
+
     async def get_by_filters(
         self, skip: int = 0, limit: int = 100, **filters
     ) -> list[Product]:
@@ -25,29 +68,84 @@ class ProductRepository:
 
         return result.scalars().all()
 
+    async def get_page(
+        self, cursor: str | None = None, limit: int = 100, **filters
+    ) -> tuple[list[Product], str | None]:
+        return await fetch_page(self.session, Product, cursor, limit, **filters)
+
+    def stream_by_filters(
+        self, cursor: str | None = None, **filters
+    ) -> AsyncIterator[Sequence[Product]]:
+        return stream_batches(self.session, Product, cursor, **filters)
+
     async def create(self, data: ProductCreate) -> Product:
-        product = Product(**data.model_dump())
-        self.session.add(product)
-        await self.session.flush()
+        result = await self.session.execute(
+            insert(Product).values(**data.model_dump()).returning(Product)
+        )
+        product = result.scalar_one()
         await self.session.commit()
-        await self.session.refresh(product)
         return product
 
-    async def update(self, id: UUID, product_update: ProductCreate) -> Product:
-        result = await self.session.execute(select(Product).where(Product.id == id))
-        product = result.scalar_one_or_none()
-        if not product:
-            raise Exception("Where is no entity with same Id")
+    async def create_many(self, items: list[ProductCreate]) -> BulkResult:
+        return await insert_many(
+            self.session, Product, [item.model_dump() for item in items]
+        )
 
-        if product_update.name is not None:
-            product.name = product_update.name
+    async def add_many(self, items: list[ProductCreate]) -> list[Product]:
+        if not items:
+            return []
+        result = await self.session.execute(
+            insert(Product).returning(Product, sort_by_parameter_order=True),
+            [item.model_dump() for item in items],
+        )
 
-        if product_update.quantity is not None:
-            product.quantity = product_update.quantity
+        return result.scalars().all()
 
-        await self.session.commit()
-        await self.session.refresh(product)
-        return product
+    async def upsert_many(self, items: list[ProductCreate]) -> list[Product]:
+        """INSERT ... ON CONFLICT (name) DO UPDATE пачками по UPSERT_CHUNK_SIZE
+
+        Повторы имени внутри пачки схлопываются, побеждает последний.
+        Транзакцию фиксирует вызывающий код.
+        """
+        rows = list({item.name: item.model_dump() for item in items}.values())
+        dialect = self.session.get_bind().dialect.name
+        insert_ = _UPSERT_INSERTS[dialect]
+        products: list[Product] = []
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            statement = insert_(Product).values(rows[start : start + UPSERT_CHUNK_SIZE])
+            statement = statement.on_conflict_do_update(
+                index_elements=[Product.name],
+                set_={
+                    "quantity": statement.excluded.quantity,
+                    "updated_at": datetime.now(),
+                },
+            )
+            result = await self.session.execute(
+                statement.returning(Product).execution_options(populate_existing=True)
+            )
+            products.extend(result.scalars().all())
+        return products
+
+    async def set_out_of_stock(self, id: UUID) -> Product | None:
+        result = await self.session.execute(
+            update(Product)
+            .where(Product.id == id)
+            .values(quantity=0, updated_at=datetime.now())
+            .returning(Product)
+            .execution_options(populate_existing=True)
+        )
+
+        return result.scalar_one_or_none()
+
+    async def update(
+        self, id: UUID, product_update: ProductCreate, commit: bool = True
+    ) -> Product:
+        values = {
+            field: value
+            for field, value in product_update.model_dump(exclude_unset=True).items()
+            if value is not None
+        }
+        return await update_returning(self.session, Product, id, values, commit)
 
     async def delete(self, id: UUID) -> None:
         await self.session.execute(delete(Product).where(Product.id == id))
@@ -0,0 +1,146 @@
+from uuid import UUID
+
+from sqlalchemy import case, delete, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Order, ProductSalesStats, UserOrderStats
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _latest(column, value):
+    # greatest() that also works on SQLite and ignores an empty column
+    return case((column.is_(None), value), (value > column, value), else_=column)
+
+
+def _earliest(column, value):
+    return case((column.is_(None), value), (value < column, value), else_=column)
+
+
+class StatsRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_product_stats(self, limit: int = 100) -> list[ProductSalesStats]:
+        result = await self.session.execute(
+            select(ProductSalesStats)
+            .order_by(
+                ProductSalesStats.orders_count.desc(), ProductSalesStats.product_id
+            )
+            .limit(limit)
+        )
+
+        return result.scalars().all()
+
+    async def get_user_stats(self, limit: int = 100) -> list[UserOrderStats]:
+        result = await self.session.execute(
+            select(UserOrderStats)
+            .order_by(UserOrderStats.orders_count.desc(), UserOrderStats.user_id)
+            .limit(limit)
+        )
+
+        return result.scalars().all()
+
+    async def add_orders(self, orders: list[Order]) -> None:
+        """Прибавить только что вставленные заказы к сводкам
+
+        Вызывается в транзакции вставки заказов, фиксирует вызывающий код.
+        Строки обновляются в порядке ключа, чтобы параллельные пачки
+        не взаимоблокировались.
+        """
+        if not orders:
+            return
+        products: dict[UUID, dict] = {}
+        users: dict[UUID, dict] = {}
+        for order in orders:
+            product = products.setdefault(
+                order.product_id,
+                {"product_id": order.product_id, "orders_count": 0},
+            )
+            product["orders_count"] += 1
+            product["last_order_at"] = max(
+                product.get("last_order_at", order.date), order.date
+            )
+            user = users.setdefault(
+                order.user_id, {"user_id": order.user_id, "orders_count": 0}
+            )
+            user["orders_count"] += 1
+            user["first_order_at"] = min(
+                user.get("first_order_at", order.date), order.date
+            )
+            user["last_order_at"] = max(
+                user.get("last_order_at", order.date), order.date
+            )
+
+        insert_ = _UPSERT_INSERTS[self.session.get_bind().dialect.name]
+        statement = insert_(ProductSalesStats).values(
+            [products[id] for id in sorted(products)]
+        )
+        await self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[ProductSalesStats.product_id],
+                set_={
+                    "orders_count": ProductSalesStats.orders_count
+                    + statement.excluded.orders_count,
+                    "last_order_at": _latest(
+                        ProductSalesStats.last_order_at,
+                        statement.excluded.last_order_at,
+                    ),
+                },
+            )
+        )
+        statement = insert_(UserOrderStats).values([users[id] for id in sorted(users)])
+        await self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[UserOrderStats.user_id],
+                set_={
+                    "orders_count": UserOrderStats.orders_count
+                    + statement.excluded.orders_count,
+                    "first_order_at": _earliest(
+                        UserOrderStats.first_order_at,
+                        statement.excluded.first_order_at,
+                    ),
+                    "last_order_at": _latest(
+                        UserOrderStats.last_order_at,
+                        statement.excluded.last_order_at,
+                    ),
+                },
+            )
+        )
+
+    async def refresh(self) -> None:
+        """Пересчитать сводки по всей таблице заказов в одной транзакции
+
+        В PostgreSQL сводки блокируются на время пересчёта: инкременты
+        консьюмера ждут его и ложатся поверх, поэтому ничего не теряется
+        и не учитывается дважды.
+        """
+        if self.session.get_bind().dialect.name == "postgresql":
+            await self.session.execute(
+                text(
+                    "LOCK TABLE product_sales_stats, user_order_stats IN EXCLUSIVE MODE"
+                )
+            )
+        await self.session.execute(delete(ProductSalesStats))
+        await self.session.execute(
+            insert(ProductSalesStats).from_select(
+                ["product_id", "orders_count", "last_order_at"],
+                select(Order.product_id, func.count(), func.max(Order.date)).group_by(
+                    Order.product_id
+                ),
+            )
+        )
+        await self.session.execute(delete(UserOrderStats))
+        await self.session.execute(
+            insert(UserOrderStats).from_select(
+                ["user_id", "orders_count", "first_order_at", "last_order_at"],
+                select(
+                    Order.user_id,
+                    func.count(),
+                    func.min(Order.date),
+                    func.max(Order.date),
+                ).group_by(Order.user_id),
+            )
+        )
+        await self.session.commit()
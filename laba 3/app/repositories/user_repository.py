@@ -1,19 +1,35 @@
+from typing import AsyncIterator, Sequence
 from uuid import UUID
 
-from sqlalchemy import delete, select
+from sqlalchemy import delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from ..DTO.UserCreate import UserCreate
 from ..DTO.UserUpdate import UserUpdate
 from ..models import User
+from .base import update_returning
+from .bulk import BulkResult, insert_many
+from .pagination import fetch_page, stream_batches
+
+# Связи, которые можно догрузить вместе с пользователями (?include=)
+USER_RELATIONSHIPS = {"addresses": User.addresses, "orders": User.orders}
+
+
+def _load_options(include: Sequence[str]) -> list:
+    # selectinload: одна выборка WHERE user_id IN (...) на связь для всех
+    # пользователей страницы, а не по запросу на пользователя
+    return [selectinload(USER_RELATIONSHIPS[name]) for name in include]
 
 
 class UserRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get_by_id(self, id: UUID) -> User | None:
-        result = await self.session.execute(select(User).where(User.id == id))
+    async def get_by_id(self, id: UUID, include: Sequence[str] = ()) -> User | None:
+        result = await self.session.execute(
+            select(User).options(*_load_options(include)).where(User.id == id)
+        )
 
         return result.scalars().one_or_none()
 
@@ -22,6 +38,17 @@ class UserRepository:
 
         return result.scalars().one_or_none()
 
+    async def get_by_ids(
+        self, ids: list[UUID], include: Sequence[str] = ()
+    ) -> list[User]:
+        if not ids:
+            return []
+        result = await self.session.execute(
+            select(User).options(*_load_options(include)).where(User.id.in_(ids))
+        )
+
+        return result.scalars().all()
+
     async def get_by_filters(
         self, skip: int = 0, limit: int = 100, **filters
     ) -> list[User]:
@@ -31,32 +58,46 @@ class UserRepository:
 
         return result.scalars().all()
 
+    async def get_page(
+        self,
+        cursor: str | None = None,
+        limit: int = 100,
+        include: Sequence[str] = (),
+        **filters,
+    ) -> tuple[list[User], str | None]:
+        return await fetch_page(
+            self.session, User, cursor, limit, _load_options(include), **filters
+        )
+
+    def stream_by_filters(
+        self, cursor: str | None = None, include: Sequence[str] = (), **filters
+    ) -> AsyncIterator[Sequence[User]]:
+        return stream_batches(
+            self.session, User, cursor, _load_options(include), **filters
+        )
+
     async def create(self, data: UserCreate) -> User:
-        user = User(login=data.login, email=data.email, description=data.description)
-        self.session.add(user)
-        await self.session.flush()
+        result = await self.session.execute(
+            insert(User)
+            .values(login=data.login, email=data.email, description=data.description)
+            .returning(User)
+        )
+        user = result.scalar_one()
         await self.session.commit()
-        await self.session.refresh(user)
         return user
 
-    async def update(self, id: UUID, user_update: UserUpdate) -> User:
-        result = await self.session.execute(select(User).where(User.id == id))
-        user = result.scalar_one_or_none()
-        if not user:
-            raise Exception("Where is no entity with same Id")
-
-        if user_update.login is not None and user_update.login != "":
-            user.login = user_update.login
-
-        if user_update.email is not None and user_update.email != "":
-            user.email = user_update.email
-
-        if user_update.description is not None and user_update.description != "":
-            user.description = user_update.description
+    async def create_many(self, items: list[UserCreate]) -> BulkResult:
+        return await insert_many(
+            self.session, User, [item.model_dump() for item in items]
+        )
 
-        await self.session.commit()
-        await self.session.refresh(user)
-        return user
+    async def update(self, id: UUID, user_update: UserUpdate) -> User:
+        values = {
+            field: value
+            for field, value in user_update.model_dump(exclude_unset=True).items()
+            if value is not None and value != ""
+        }
+        return await update_returning(self.session, User, id, values)
 
     async def delete(self, id: UUID) -> None:
         await self.session.execute(delete(User).where(User.id == id))
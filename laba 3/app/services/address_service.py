@@ -1,29 +1,53 @@
+from typing import AsyncIterator, Sequence
 from uuid import UUID
 
 from app.models import Address
 
+from ..cache.entity_cache import EntityCache
+from ..cache.redis_client import get_redis
 from ..DTO.AddressCreate import AddressCreate
 from ..repositories.address_repository import AddressRepository
+from ..repositories.bulk import BulkResult
 
 
 class AddressService:
     def __init__(self, address_repository: AddressRepository):
         self.address_repository = address_repository
+        self._cache = EntityCache.for_entity("address", get_redis())
 
     async def get_by_id(self, address_id: UUID) -> Address | None:
-        address = await self.address_repository.get_by_id(address_id)
-        return address
+        return await self._cache.get_or_load(
+            address_id, self.address_repository.get_by_id
+        )
 
     async def get_by_filter(
         self, skip: int = 0, limit: int = 100, **filters
     ) -> list[Address]:
         return await self.address_repository.get_by_filters(skip, limit, **filters)
 
+    async def get_page(
+        self, cursor: str | None = None, limit: int = 100, **filters
+    ) -> tuple[list[Address], str | None]:
+        return await self.address_repository.get_page(cursor, limit, **filters)
+
+    def stream_by_filter(
+        self, cursor: str | None = None, **filters
+    ) -> AsyncIterator[Sequence[Address]]:
+        return self.address_repository.stream_by_filters(cursor, **filters)
+
     async def create(self, address_data: AddressCreate) -> Address:
-        return await self.address_repository.create(address_data)
+        address = await self.address_repository.create(address_data)
+        await self._cache.set(address)
+        return address
+
+    async def create_many(self, items: list[AddressCreate]) -> BulkResult:
+        return await self.address_repository.create_many(items)
 
     async def update(self, address_id: UUID, address_data: AddressCreate) -> Address:
-        return await self.address_repository.update(address_id, address_data)
+        address = await self.address_repository.update(address_id, address_data)
+        await self._cache.set(address)
+        return address
 
     async def delete(self, address_id: UUID) -> None:
-        return await self.address_repository.delete(address_id)
+        await self.address_repository.delete(address_id)
+        await self._cache.delete(address_id)
@@ -1,29 +1,55 @@
+from typing import AsyncIterator, Sequence
 from uuid import UUID
 
 from app.models import Order
 
+from ..cache.entity_cache import EntityCache
+from ..cache.redis_client import get_redis
 from ..DTO.OrderCreate import OrderCreate
+from ..rabbitmq.publisher import publish_order
+from ..repositories.bulk import BulkResult
 from ..repositories.order_repository import OrderRepository
 
 
 class OrderService:
     def __init__(self, order_repository: OrderRepository):
         self.order_repository = order_repository
+        self._cache = EntityCache.for_entity("order", get_redis())
 
     async def get_by_id(self, order_id: UUID) -> Order | None:
-        order = await self.order_repository.get_by_id(order_id)
-        return order
+        return await self._cache.get_or_load(order_id, self.order_repository.get_by_id)
 
     async def get_by_filter(
         self, skip: int = 0, limit: int = 100, **filters
     ) -> list[Order]:
         return await self.order_repository.get_by_filters(skip, limit, **filters)
 
+    async def get_page(
+        self, cursor: str | None = None, limit: int = 100, **filters
+    ) -> tuple[list[Order], str | None]:
+        return await self.order_repository.get_page(cursor, limit, **filters)
+
+    def stream_by_filter(
+        self, cursor: str | None = None, **filters
+    ) -> AsyncIterator[Sequence[Order]]:
+        return self.order_repository.stream_by_filters(cursor, **filters)
+
     async def create(self, order_data: OrderCreate) -> Order:
-        return await self.order_repository.create(order_data)
+        order = await self.order_repository.create(order_data)
+        await self._cache.set(order)
+        return order
+
+    async def submit(self, order_data: OrderCreate) -> UUID:
+        return await publish_order(order_data)
+
+    async def create_many(self, items: list[OrderCreate]) -> BulkResult:
+        return await self.order_repository.create_many(items)
 
     async def update(self, order_id: UUID, order_data: OrderCreate) -> Order:
-        return await self.order_repository.update(order_id, order_data)
+        order = await self.order_repository.update(order_id, order_data)
+        await self._cache.set(order)
+        return order
 
     async def delete(self, order_id: UUID) -> None:
-        return await self.order_repository.delete(order_id)
+        await self.order_repository.delete(order_id)
+        await self._cache.delete(order_id)
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import os
+
+from app.models import ProductSalesStats, UserOrderStats
+
+from ..cache.redis_client import get_redis
+from ..database import async_session_factory
+from ..repositories.stats_repository import StatsRepository
+
+logger = logging.getLogger(__name__)
+
+# Полный пересчёт сводок: догоняет заказы, записанные мимо консьюмера
+# (API, удаления); 0 - отключить
+STATS_REFRESH_INTERVAL = float(os.getenv("STATS_REFRESH_INTERVAL", "300"))
+# Пересчитывает один воркер за интервал
+STATS_REFRESH_LOCK = "stats:refresh"
+
+
+class StatsService:
+    def __init__(self, stats_repository: StatsRepository):
+        self.stats_repository = stats_repository
+
+    async def get_product_stats(self, limit: int = 100) -> list[ProductSalesStats]:
+        return await self.stats_repository.get_product_stats(limit)
+
+    async def get_user_stats(self, limit: int = 100) -> list[UserOrderStats]:
+        return await self.stats_repository.get_user_stats(limit)
+
+
+async def refresh_stats() -> bool:
+    """Пересчитать сводки, если в этом интервале их ещё никто не пересчитал"""
+    redis = get_redis()
+    if redis is not None:
+        try:
+            claimed = await redis.set(
+                STATS_REFRESH_LOCK, 1, nx=True, ex=max(1, int(STATS_REFRESH_INTERVAL))
+            )
+        except Exception as e:
+            logger.warning("Stats refresh lock failed: %s", e)
+            claimed = True
+        if not claimed:
+            return False
+    async with async_session_factory() as session:
+        await StatsRepository(session).refresh()
+    return True
+
+
+async def _refresh_loop() -> None:
+    while True:
+        try:
+            await refresh_stats()
+        except Exception as e:
+            logger.warning("Stats refresh failed: %s", e)
+        await asyncio.sleep(STATS_REFRESH_INTERVAL)
+
+
+class _RefresherState:
+    task: asyncio.Task | None = None
+
+
+async def start_stats_refresher() -> None:
+    """Запустить периодический пересчёт сводок (после открытия пула Redis)"""
+    if STATS_REFRESH_INTERVAL <= 0 or _RefresherState.task is not None:
+        return
+    _RefresherState.task = asyncio.create_task(_refresh_loop())
+
+
+async def stop_stats_refresher() -> None:
+    task, _RefresherState.task = _RefresherState.task, None
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
@@ -1,75 +1,78 @@
 import uuid
-import json
-from types import SimpleNamespace
-from datetime import datetime
+from typing import AsyncIterator, Sequence
 
+from ..cache.entity_cache import EntityCache
+from ..cache.redis_client import get_redis
 from ..DTO.UserCreate import UserCreate
 from ..DTO.UserUpdate import UserUpdate
 from ..models import User
+from ..repositories.bulk import BulkResult
 from ..repositories.user_repository import UserRepository
-from ..cache.redis_client import get_redis
 
 
 class UserService:
-    CACHE_PREFIX = "user:"
-    CACHE_TTL = 3600
-
     def __init__(self, user_repository: UserRepository):
         self.user_repository = user_repository
-        self._redis = get_redis()
+        self._cache = EntityCache.for_entity("user", get_redis())
 
-    async def get_by_id(self, user_id: uuid.UUID) -> User | None:
-        if self._redis is not None:
-            key = f"{self.CACHE_PREFIX}{user_id}"
-            raw = await self._redis.get(key)
-            if raw:
-                data = json.loads(raw)
-                return SimpleNamespace(
-                    id=uuid.UUID(data["id"]),
-                    login=data["login"],
-                    email=data["email"],
-                    description=data.get("description", ""),
-                )
+    async def get_by_id(
+        self, user_id: uuid.UUID, *, include: Sequence[str] = ()
+    ) -> User | None:
+        # В кэше пользователи без связей: с include читаем из БД
+        if include:
+            return await self.user_repository.get_by_id(user_id, include)
+        return await self._cache.get_or_load(user_id, self.user_repository.get_by_id)
 
-        user = await self.user_repository.get_by_id(user_id)
-        if user and self._redis is not None:
-            key = f"{self.CACHE_PREFIX}{user_id}"
-            payload = {
-                "id": str(user.id),
-                "login": user.login,
-                "email": user.email,
-                "description": user.description or "",
+    async def get_many(
+        self, user_ids: list[uuid.UUID], *, include: Sequence[str] = ()
+    ) -> list[User]:
+        if include:
+            found = {
+                user.id: user
+                for user in await self.user_repository.get_by_ids(user_ids, include)
             }
-            await self._redis.setex(key, self.CACHE_TTL, json.dumps(payload))
-        return user
+        else:
+            found = await self._cache.get_many(
+                user_ids, self.user_repository.get_by_ids
+            )
+        return [found[id] for id in dict.fromkeys(user_ids) if id in found]
 
     async def get_by_filter(
         self, skip: int = 0, limit: int = 100, **filters
     ) -> list[User]:
         return await self.user_repository.get_by_filters(skip, limit, **filters)
 
+    async def get_page(
+        self,
+        cursor: str | None = None,
+        limit: int = 100,
+        *,
+        include: Sequence[str] = (),
+        **filters,
+    ) -> tuple[list[User], str | None]:
+        return await self.user_repository.get_page(cursor, limit, include, **filters)
+
+    def stream_by_filter(
+        self, cursor: str | None = None, *, include: Sequence[str] = (), **filters
+    ) -> AsyncIterator[Sequence[User]]:
+        return self.user_repository.stream_by_filters(cursor, include, **filters)
+
     async def create(self, user_data: UserCreate) -> User:
         user = await self.user_repository.create(user_data)
-        if user and self._redis is not None:
-            key = f"{self.CACHE_PREFIX}{user.id}"
-            payload = {
-                "id": str(user.id),
-                "login": user.login,
-                "email": user.email,
-                "description": user.description or "",
-            }
-            await self._redis.setex(key, self.CACHE_TTL, json.dumps(payload))
+        await self._cache.set(user)
         return user
 
+    async def create_many(self, items: list[UserCreate]) -> BulkResult:
+        result = await self.user_repository.create_many(items)
+        # Снять надгробия, если эти ID уже запрашивали до создания
+        await self._cache.delete(*(user.id for _, user in result.created))
+        return result
+
     async def update(self, user_id: uuid.UUID, user_data: UserUpdate) -> User:
         user = await self.user_repository.update(user_id, user_data)
-        if self._redis is not None:
-            key = f"{self.CACHE_PREFIX}{user_id}"
-            await self._redis.delete(key)
+        await self._cache.set(user)
         return user
 
     async def delete(self, user_id: uuid.UUID) -> None:
-        if self._redis is not None:
-            key = f"{self.CACHE_PREFIX}{user_id}"
-            await self._redis.delete(key)
-        return await self.user_repository.delete(user_id)
+        await self.user_repository.delete(user_id)
+        await self._cache.delete(user_id)
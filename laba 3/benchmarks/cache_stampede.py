@@ -0,0 +1,70 @@
+"""Число обращений к БД на одно истечение горячего ключа при 500 читателях
+
+Сравниваются простой read-through и EntityCache с защитой от лавины промахов.
+Нужен запущенный Redis (REDIS_URL).
+
+Запуск: python -m benchmarks.cache_stampede
+"""
+
+import asyncio
+import time
+
+from app.cache.entity_cache import ENTITY_CACHES, EntityCache
+from app.cache.redis_client import REDIS_URL, redis
+from app.DTO.ProductCreate import ProductCreate
+from app.repositories.product_repository import ProductRepository
+
+from .common import bench_database, count_round_trips
+
+READERS = 500
+EXPIRIES = 5
+
+
+async def naive_get_or_load(client, cache: EntityCache, id, loader):
+    raw = await client.get(cache.key(id))
+    if raw:
+        return cache.codec.decode(raw)
+    entity = await loader(id)
+    await client.setex(cache.key(id), cache.ttl, cache.codec.encode(entity))
+    return entity
+
+
+async def run() -> None:
+    client = redis.from_url(REDIS_URL)
+    async with bench_database() as (engine, session_factory):
+        async with session_factory() as session:
+            product = await ProductRepository(session).create(
+                ProductCreate(name="hot product", quantity=100)
+            )
+        cache = EntityCache(client, ENTITY_CACHES["product"])
+        counter = count_round_trips(engine)
+
+        async def read(get_or_load) -> None:
+            async with session_factory() as session:
+                await get_or_load(product.id, ProductRepository(session).get_by_id)
+
+        cases = {
+            "read-through": lambda id, loader: naive_get_or_load(
+                client, cache, id, loader
+            ),
+            "single-flight": cache.get_or_load,
+        }
+
+        print(f"{'case':<16}{'db hits/expiry':>16}{'ms/expiry':>12}")
+        for name, get_or_load in cases.items():
+            counter.reset()
+            started = time.perf_counter()
+            for _ in range(EXPIRIES):
+                await client.delete(cache.key(product.id))
+                await asyncio.gather(*(read(get_or_load) for _ in range(READERS)))
+            elapsed = time.perf_counter() - started
+            print(
+                f"{name:<16}{counter.statements / EXPIRIES:>16.1f}"
+                f"{elapsed * 1000 / EXPIRIES:>12.1f}"
+            )
+        await client.delete(cache.key(product.id))
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,58 @@
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.database import create_engine
+from app.models import Base
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite+aiosqlite:///./bench.db")
+
+
+@dataclass
+class RoundTrips:
+    """Счётчик обращений к БД: выполненные команды и коммиты"""
+
+    statements: int = 0
+    commits: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.statements + self.commits
+
+    def reset(self) -> None:
+        self.statements = 0
+        self.commits = 0
+
+
+def count_round_trips(engine: AsyncEngine) -> RoundTrips:
+    counter = RoundTrips()
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _on_execute(*_args):
+        counter.statements += 1
+
+    @event.listens_for(engine.sync_engine, "commit")
+    def _on_commit(*_args):
+        counter.commits += 1
+
+    return counter
+
+
+@asynccontextmanager
+async def bench_database(url: str = BENCH_DATABASE_URL):
+    """Движок с чистой схемой для замеров; схема удаляется по завершении"""
+    engine = create_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield engine, async_sessionmaker(
+            engine, expire_on_commit=False, class_=AsyncSession
+        )
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
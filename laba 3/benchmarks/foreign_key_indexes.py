@@ -0,0 +1,126 @@
+"""Заказы по user_id и скорость вставки до и после миграции 9b3f6c1d4e27
+
+"до" - схема с лишними UNIQUE (id) (по два на таблицу, как оставили старые
+миграции), UNIQUE (description) и без индексов по внешним ключам;
+"после" - текущие модели.
+
+Запуск: python -m benchmarks.foreign_key_indexes
+"""
+
+import asyncio
+import random
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import insert
+
+from app.DTO.OrderCreate import OrderCreate
+from app.models import Address, Product, User
+from app.repositories.order_repository import OrderRepository
+
+from .common import bench_database
+
+USERS = 200
+PRODUCTS = 100
+ORDERS = 20000
+BULK_CHUNK = 500
+SINGLE_INSERTS = 500
+LOOKUPS = 500
+PAGE_SIZE = 20
+
+FK_INDEXES = (
+    "ix_orders_user_id_created_at_id",
+    "ix_orders_product_id",
+    "ix_orders_address_id",
+    "ix_addresses_user_id_created_at_id",
+)
+
+
+async def legacy_schema(engine) -> None:
+    """Вернуть схему к состоянию до миграции"""
+    async with engine.begin() as conn:
+        for name in FK_INDEXES:
+            await conn.exec_driver_sql(f"DROP INDEX {name}")
+        for table in ("users", "products", "orders", "addresses"):
+            for suffix in ("key", "key1"):
+                await conn.exec_driver_sql(
+                    f"CREATE UNIQUE INDEX {table}_id_{suffix} ON {table} (id)"
+                )
+        await conn.exec_driver_sql(
+            "CREATE UNIQUE INDEX users_description_key ON users (description)"
+        )
+
+
+async def seed(session) -> tuple[list, list, list]:
+    users = [
+        {"id": uuid4(), "login": f"user{n}", "email": f"user{n}@example.com"}
+        for n in range(USERS)
+    ]
+    addresses = [
+        {"id": uuid4(), "user_id": user["id"], "street": f"street {n}"}
+        for n, user in enumerate(users)
+    ]
+    products = [
+        {"id": uuid4(), "name": f"product {n}", "quantity": 1000}
+        for n in range(PRODUCTS)
+    ]
+    await session.execute(insert(User), users)
+    await session.execute(insert(Address), addresses)
+    await session.execute(insert(Product), products)
+    await session.commit()
+    return users, addresses, products
+
+
+def make_orders(count: int, addresses: list, products: list) -> list[OrderCreate]:
+    orders = []
+    for _ in range(count):
+        address = random.choice(addresses)
+        orders.append(
+            OrderCreate(
+                user_id=address["user_id"],
+                address_id=address["id"],
+                product_id=random.choice(products)["id"],
+                date=datetime.now(),
+            )
+        )
+    return orders
+
+
+async def measure(name: str, legacy: bool) -> None:
+    random.seed(1)
+    async with bench_database() as (engine, session_factory):
+        if legacy:
+            await legacy_schema(engine)
+        async with session_factory() as session:
+            users, addresses, products = await seed(session)
+            repo = OrderRepository(session)
+
+            orders = make_orders(ORDERS, addresses, products)
+            started = time.perf_counter()
+            for start in range(0, ORDERS, BULK_CHUNK):
+                await repo.add_many(orders[start : start + BULK_CHUNK])
+                await session.commit()
+            bulk = ORDERS / (time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for order in make_orders(SINGLE_INSERTS, addresses, products):
+                await repo.create(order)
+            single = SINGLE_INSERTS / (time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for _ in range(LOOKUPS):
+                await repo.get_page(None, PAGE_SIZE, user_id=random.choice(users)["id"])
+            lookup = (time.perf_counter() - started) * 1000 / LOOKUPS
+
+    print(f"{name:<10}{bulk:>16,.0f}{single:>16,.0f}{lookup:>16.3f}")
+
+
+async def run() -> None:
+    print(f"{'schema':<10}{'bulk rows/s':>16}{'single rows/s':>16}{'ms/lookup':>16}")
+    await measure("before", legacy=True)
+    await measure("after", legacy=False)
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
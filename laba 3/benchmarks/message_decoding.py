@@ -0,0 +1,87 @@
+"""Скорость разбора сообщений консьюмера: json + pydantic против msgspec
+
+Запуск: python -m benchmarks.message_decoding
+"""
+
+import json
+import time
+from datetime import datetime
+from uuid import UUID, uuid4
+
+import msgspec
+
+from app.DTO.OrderCreate import OrderCreate
+from app.rabbitmq.messages import OrderMessage, decode_message
+
+MESSAGES = 20000
+ITEMS_PER_ORDER = 5
+
+
+def legacy_decode(body: bytes) -> list[OrderCreate]:
+    """Прежний путь: json.loads, dict.get, UUID(...) и OrderCreate на позицию"""
+    payload = json.loads(body.decode())
+    order = payload.get("order", {})
+    date = order.get("date")
+    if isinstance(date, str):
+        date = datetime.fromisoformat(date)
+    rows = []
+    for item in order.get("products", []):
+        pid = item.get("product_id")
+        if not pid:
+            raise ValueError("product_id required in order items")
+        int(item.get("quantity", 1))
+        rows.append(
+            OrderCreate(
+                user_id=UUID(order.get("user_id")),
+                address_id=UUID(order.get("address_id")),
+                product_id=UUID(pid),
+                date=date,
+            )
+        )
+    return rows
+
+
+def make_payload() -> dict:
+    return {
+        "action": "create",
+        "order": {
+            "user_id": str(uuid4()),
+            "address_id": str(uuid4()),
+            "date": datetime.now().isoformat(),
+            "products": [
+                {"product_id": str(uuid4()), "quantity": 2}
+                for _ in range(ITEMS_PER_ORDER)
+            ],
+        },
+    }
+
+
+def measure(name: str, decode, bodies: list[bytes]) -> None:
+    started = time.perf_counter()
+    for body in bodies:
+        decode(body)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<24}{len(bodies) / elapsed:>14,.0f}")
+
+
+def run() -> None:
+    payloads = [make_payload() for _ in range(MESSAGES)]
+    json_bodies = [json.dumps(payload).encode() for payload in payloads]
+    msgpack_bodies = [msgspec.msgpack.encode(payload) for payload in payloads]
+
+    print(f"{'decoder':<24}{'messages/s':>14}")
+    measure("json + pydantic", legacy_decode, json_bodies)
+    measure(
+        "msgspec json",
+        lambda body: decode_message(body, "application/json", OrderMessage),
+        json_bodies,
+    )
+    measure(
+        "msgspec msgpack",
+        lambda body: decode_message(body, "application/msgpack", OrderMessage),
+        msgpack_bodies,
+    )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,79 @@
+"""Сравнение числа обращений к БД на запись: старый путь и INSERT/UPDATE RETURNING
+
+Запуск: python -m benchmarks.write_round_trips
+"""
+
+import asyncio
+import time
+
+from sqlalchemy import select
+
+from app.DTO.ProductCreate import ProductCreate
+from app.DTO.UserCreate import UserCreate
+from app.DTO.UserUpdate import UserUpdate
+from app.models import Product, User
+from app.repositories.product_repository import ProductRepository
+from app.repositories.user_repository import UserRepository
+
+from .common import bench_database, count_round_trips
+
+ITERATIONS = 200
+
+
+async def legacy_create_product(session, data: ProductCreate) -> Product:
+    product = Product(**data.model_dump())
+    session.add(product)
+    await session.flush()
+    await session.commit()
+    await session.refresh(product)
+    return product
+
+
+async def legacy_update_user(session, id, user_update: UserUpdate) -> User:
+    result = await session.execute(select(User).where(User.id == id))
+    user = result.scalar_one()
+    if user_update.email:
+        user.email = user_update.email
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+async def run() -> None:
+    async with bench_database() as (engine, session_factory):
+        counter = count_round_trips(engine)
+        async with session_factory() as session:
+            user = await UserRepository(session).create(
+                UserCreate(login="bench", email="bench@example.com", description="")
+            )
+
+            cases = {
+                "create product (legacy)": lambda i: legacy_create_product(
+                    session, ProductCreate(name=f"legacy {i}", quantity=i)
+                ),
+                "create product (RETURNING)": lambda i: ProductRepository(
+                    session
+                ).create(ProductCreate(name=f"returning {i}", quantity=i)),
+                "update user (legacy)": lambda i: legacy_update_user(
+                    session, user.id, UserUpdate(email=f"legacy{i}@example.com")
+                ),
+                "update user (RETURNING)": lambda i: UserRepository(session).update(
+                    user.id, UserUpdate(email=f"returning{i}@example.com")
+                ),
+            }
+
+            print(f"{'case':<28}{'trips/op':>10}{'ms/op':>10}")
+            for name, case in cases.items():
+                counter.reset()
+                started = time.perf_counter()
+                for i in range(ITERATIONS):
+                    await case(i)
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{name:<28}{counter.total / ITERATIONS:>10.1f}"
+                    f"{elapsed * 1000 / ITERATIONS:>10.3f}"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
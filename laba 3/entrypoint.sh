@@ -5,6 +5,9 @@ while ! nc -z $DB_HOST $DB_PORT; do
   sleep 1
 done
 
-alembic upgrade head
+# Миграции применяет только веб-приложение
+if [ -z "$SKIP_MIGRATIONS" ]; then
+  alembic upgrade head
+fi
 
 exec "$@"
\ No newline at end of file
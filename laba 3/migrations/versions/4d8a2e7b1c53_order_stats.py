@@ -0,0 +1,57 @@
+"""sales and order summary tables
+
+Revision ID: 4d8a2e7b1c53
+Revises: 9b3f6c1d4e27
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d8a2e7b1c53'
+down_revision: Union[str, Sequence[str], None] = '9b3f6c1d4e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('product_sales_stats',
+    sa.Column('product_id', sa.UUID(), nullable=False),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('last_order_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_index('ix_product_sales_stats_orders_count', 'product_sales_stats', ['orders_count'])
+    op.create_table('user_order_stats',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('first_order_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_order_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_user_order_stats_orders_count', 'user_order_stats', ['orders_count'])
+
+    # Initial fill from the existing orders
+    op.execute("""
+        INSERT INTO product_sales_stats (product_id, orders_count, last_order_at)
+        SELECT product_id, count(*), max(date) FROM orders GROUP BY product_id
+    """)
+    op.execute("""
+        INSERT INTO user_order_stats (user_id, orders_count, first_order_at, last_order_at)
+        SELECT user_id, count(*), min(date), max(date) FROM orders GROUP BY user_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_order_stats_orders_count', table_name='user_order_stats')
+    op.drop_table('user_order_stats')
+    op.drop_index('ix_product_sales_stats_orders_count', table_name='product_sales_stats')
+    op.drop_table('product_sales_stats')
@@ -0,0 +1,34 @@
+"""keyset pagination indexes
+
+Revision ID: 5c1e7d2a9b40
+Revises: ad3ec4c6b3a4
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7d2a9b40'
+down_revision: Union[str, Sequence[str], None] = 'ad3ec4c6b3a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'])
+    op.create_index('ix_products_created_at_id', 'products', ['created_at', 'id'])
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'])
+    op.create_index('ix_addresses_created_at_id', 'addresses', ['created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_addresses_created_at_id', table_name='addresses')
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
+    op.drop_index('ix_products_created_at_id', table_name='products')
+    op.drop_index('ix_users_created_at_id', table_name='users')
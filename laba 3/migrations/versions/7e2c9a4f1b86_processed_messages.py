@@ -0,0 +1,35 @@
+"""processed message ids for consumer idempotency
+
+Revision ID: 7e2c9a4f1b86
+Revises: 4d8a2e7b1c53
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2c9a4f1b86'
+down_revision: Union[str, Sequence[str], None] = '4d8a2e7b1c53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('processed_messages',
+    sa.Column('queue', sa.String(length=64), nullable=False),
+    sa.Column('message_id', sa.String(length=255), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('queue', 'message_id')
+    )
+    op.create_index('ix_processed_messages_processed_at', 'processed_messages', ['processed_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_processed_messages_processed_at', table_name='processed_messages')
+    op.drop_table('processed_messages')
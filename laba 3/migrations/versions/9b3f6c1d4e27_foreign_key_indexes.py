@@ -0,0 +1,98 @@
+"""foreign key indexes, drop redundant unique constraints
+
+Revision ID: 9b3f6c1d4e27
+Revises: 5c1e7d2a9b40
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3f6c1d4e27'
+down_revision: Union[str, Sequence[str], None] = '5c1e7d2a9b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('users', 'products', 'orders', 'addresses')
+
+# (constraint, table, column, referred table)
+FOREIGN_KEYS = (
+    ('orders_user_id_fkey', 'orders', 'user_id', 'users'),
+    ('orders_address_id_fkey', 'orders', 'address_id', 'addresses'),
+    ('orders_product_id_fkey', 'orders', 'product_id', 'products'),
+    ('addresses_user_id_fkey', 'addresses', 'user_id', 'users'),
+)
+
+# user_id is filtered and paged on, so it is followed by the keyset order of
+# get_page; product_id and address_id only serve FK checks and joins
+FK_INDEXES = (
+    ('ix_orders_user_id_created_at_id', 'orders', ['user_id', 'created_at', 'id']),
+    ('ix_orders_product_id', 'orders', ['product_id']),
+    ('ix_orders_address_id', 'orders', ['address_id']),
+    ('ix_addresses_user_id_created_at_id', 'addresses', ['user_id', 'created_at', 'id']),
+)
+
+
+def _drop_id_unique_constraints(table: str) -> None:
+    # Earlier revisions created one or two unnamed UNIQUE (id) per table on
+    # top of the primary key; drop all of them whatever their names are
+    op.execute(f"""
+        DO $$
+        DECLARE constraint_name text;
+        BEGIN
+            FOR constraint_name IN
+                SELECT c.conname FROM pg_constraint c
+                JOIN pg_attribute a
+                  ON a.attrelid = c.conrelid AND a.attname = 'id'
+                WHERE c.conrelid = '{table}'::regclass
+                  AND c.contype = 'u'
+                  AND c.conkey = ARRAY[a.attnum]
+            LOOP
+                EXECUTE format('ALTER TABLE {table} DROP CONSTRAINT %I', constraint_name);
+            END LOOP;
+        END $$;
+    """)
+
+
+def _drop_foreign_keys() -> None:
+    # A foreign key is bound to whichever unique index existed when it was
+    # created, which may be a redundant one; recreated keys use the pkey
+    for name, table, _, _ in FOREIGN_KEYS:
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}')
+
+
+def _create_foreign_keys() -> None:
+    for name, table, column, referred in FOREIGN_KEYS:
+        op.create_foreign_key(name, table, referred, [column], ['id'])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _drop_foreign_keys()
+    for table in TABLES:
+        _drop_id_unique_constraints(table)
+    _create_foreign_keys()
+
+    # Free text, not an identifier: users with the same description are valid
+    op.execute('ALTER TABLE users DROP CONSTRAINT IF EXISTS users_description_key')
+
+    for name, table, columns in FK_INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(FK_INDEXES):
+        op.drop_index(name, table_name=table)
+
+    op.create_unique_constraint('users_description_key', 'users', ['description'])
+
+    _drop_foreign_keys()
+    for table in TABLES:
+        op.create_unique_constraint(f'{table}_id_key', table, ['id'])
+    _create_foreign_keys()
@@ -1,3 +1,6 @@
+import asyncio
+import json
+
 from litestar import Litestar
 from litestar.di import Provide
 import pytest
@@ -11,7 +14,10 @@ from litestar.testing import TestClient
 from app.controllers.user_controller import UserController
 from app.services.user_service import UserService
 from app.DTO.UserCreate import UserCreate
-from app.models import User
+from app.models import Address, User
+from app.repositories.bulk import BulkResult
+from app import database
+from app.controllers.metrics_controller import MetricsController
 
 
 @pytest_asyncio.fixture
@@ -89,14 +95,122 @@ class TestUserController:
         """Тест успешного получения всех пользователей"""
 
         users = [sample_user]
-        mock_user_service.get_by_filter.return_value = users
+        mock_user_service.get_page.return_value = (users, None)
         
         response = test_client.get("/users")
         assert response.status_code == 200
         data = response.json()
         assert len(data) == 1
         assert data[0]["id"] == str(sample_user.id)
-        mock_user_service.get_by_filter.assert_called_once()
+        assert "x-next-cursor" not in response.headers
+        mock_user_service.get_page.assert_called_once_with(None, 100)
+
+    def test_get_all_users_next_cursor(self, mock_user_service, test_client, sample_user):
+        """Тест передачи курсора следующей страницы"""
+        mock_user_service.get_page.return_value = ([sample_user], "next-page")
+
+        response = test_client.get("/users", params={"cursor": "page", "limit": 1})
+
+        assert response.status_code == 200
+        assert response.headers["x-next-cursor"] == "next-page"
+        mock_user_service.get_page.assert_called_once_with("page", 1)
+
+    def test_get_all_users_ndjson(self, mock_user_service, test_client, sample_user):
+        """Тест потоковой выдачи пользователей в NDJSON"""
+        async def batches():
+            yield [sample_user]
+            yield [sample_user]
+
+        mock_user_service.stream_by_filter.return_value = batches()
+
+        response = test_client.get(
+            "/users", headers={"Accept": "application/x-ndjson"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = response.text.splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[0])["id"] == str(sample_user.id)
+        mock_user_service.get_page.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_all_users_ndjson_client_disconnect(
+        self, mock_user_service, app, sample_user
+    ):
+        """Отключение клиента сразу закрывает поток и его сессию"""
+        closed = []
+
+        async def batches():
+            try:
+                while True:
+                    yield [sample_user]
+            finally:
+                closed.append(True)
+
+        mock_user_service.stream_by_filter.return_value = batches()
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                # Клиент перестал читать и ушёл
+                disconnected.set()
+                await asyncio.Event().wait()
+
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/users",
+            "raw_path": b"/users",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"accept", b"application/x-ndjson")],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80),
+        }
+        await asyncio.wait_for(app(scope, receive, send), 5)
+
+        assert closed == [True]
+
+    def test_get_users_by_ids(self, mock_user_service, test_client, sample_user):
+        """Тест получения пользователей по списку ID"""
+        missing_id = uuid4()
+        mock_user_service.get_many.return_value = [sample_user]
+
+        response = test_client.get(
+            "/users", params={"ids": [str(sample_user.id), str(missing_id)]}
+        )
+
+        assert response.status_code == 200
+        assert [user["id"] for user in response.json()] == [str(sample_user.id)]
+        mock_user_service.get_many.assert_called_once_with([sample_user.id, missing_id])
+        mock_user_service.get_page.assert_not_called()
+
+    def test_get_user_with_include(self, mock_user_service, test_client, sample_user):
+        """Тест получения пользователя вместе с адресами одним запросом"""
+        sample_user.addresses = [Address(id=uuid4(), user_id=sample_user.id, street="Main")]
+        mock_user_service.get_by_id.return_value = sample_user
+
+        response = test_client.get(f"/users/{sample_user.id}", params={"include": "addresses"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [address["street"] for address in data["addresses"]] == ["Main"]
+        assert "orders" not in data
+        mock_user_service.get_by_id.assert_called_once_with(sample_user.id, include=("addresses",))
+
+    def test_get_users_unknown_include(self, mock_user_service, test_client):
+        """Тест: неизвестная связь в include - ошибка клиента"""
+        response = test_client.get("/users", params={"include": "addresses,payments"})
+
+        assert response.status_code == 400
+        mock_user_service.get_page.assert_not_called()
 
     def test_create_user_success(self, mock_user_service, test_client, sample_user):
         user_data = {
@@ -113,6 +227,25 @@ class TestUserController:
         assert data["id"] == str(sample_user.id)
         mock_user_service.create.assert_called_once()
 
+    def test_create_users_bulk(self, mock_user_service, test_client, sample_user):
+        """Тест массового создания пользователей с ошибками по позициям"""
+        mock_user_service.create_many.return_value = BulkResult(
+            created=[(0, sample_user)], errors=[(1, "duplicate login")]
+        )
+        users_data = [
+            {"login": "first", "email": "first@example.com", "description": "1"},
+            {"login": "second", "email": "second@example.com", "description": "2"},
+            {"login": "broken"},
+        ]
+
+        response = test_client.post("/users/bulk", json=users_data)
+
+        assert response.status_code == 201
+        data = response.json()
+        assert [user["id"] for user in data["created"]] == [str(sample_user.id)]
+        assert [error["index"] for error in data["errors"]] == [1, 2]
+        assert len(mock_user_service.create_many.call_args.args[0]) == 2
+
     def test_update_user_success(self, mock_user_service, test_client, sample_user):
         """Тест успешного обновления пользователя"""
         update_data = {
@@ -144,4 +277,67 @@ class TestUserController:
             response = test_client.get(f"/users/{user_id}")
         except Exception as e:
             assert e is ValueError
-        mock_user_service.get_by_id.assert_called_once_with(user_id)
\ No newline at end of file
+        mock_user_service.get_by_id.assert_called_once_with(user_id)
+
+
+class TestMetricsController:
+
+    @pytest.fixture
+    def pool_stats(self, monkeypatch):
+        """Чистая статистика пула на время теста"""
+        stats = database.PoolWaitStats()
+        monkeypatch.setattr(database, "pool_wait_stats", stats)
+        return stats
+
+    @pytest.fixture
+    def pool_engine(self):
+        """Движок с одним соединением в пуле, замеряющим ожидание"""
+        return database.create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            poolclass=database.TimedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+
+    @pytest.mark.asyncio
+    async def test_pool_separates_connect_from_wait(self, pool_stats, pool_engine):
+        """Установка соединения не считается ожиданием свободного соединения"""
+        for _ in range(3):
+            async with pool_engine.connect():
+                pass
+        await pool_engine.dispose()
+
+        assert pool_stats.connects == 1
+        assert pool_stats.checkouts == 3
+        assert pool_stats.timeouts == 0
+        assert pool_stats.total_wait < pool_stats.total_connect
+
+    @pytest.mark.asyncio
+    async def test_pool_counts_timeouts(self, pool_stats, pool_engine):
+        """Исчерпанный пул засчитывает тайм-аут ожидания"""
+        async with pool_engine.connect():
+            with pytest.raises(database.exc.TimeoutError):
+                async with pool_engine.connect():
+                    pass
+        await pool_engine.dispose()
+
+        assert pool_stats.timeouts == 1
+        assert pool_stats.checkouts == 1
+
+    def test_get_db_metrics(self, pool_stats):
+        """Эндпоинт отдаёт состояние пула и статистику ожидания"""
+        pool_stats.record(0.002)
+        pool_stats.record_connect(0.01)
+
+        with TestClient(app=Litestar(route_handlers=[MetricsController])) as client:
+            response = client.get("/metrics/db")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["checkouts"] == 2
+        assert data["connects"] == 1
+        assert data["max_wait_ms"] == 2.0
+        assert data["avg_connect_ms"] == 10.0
+        assert data["timeouts"] == 0
+        assert "status" in data
@@ -4,11 +4,22 @@ from app.repositories.user_repository import UserRepository
 from app.repositories.product_repository import ProductRepository
 from app.repositories.order_repository import OrderRepository
 from app.repositories.address_repository import AddressRepository
+from app.repositories.pagination import InvalidCursorError
+from app.repositories.stats_repository import StatsRepository
+import msgspec
+from sqlalchemy import event
+from app.rabbitmq.consumer import _process_new, _process_order_batch, _process_order_message, _process_product_batch
+from app.repositories.processed_message_repository import ProcessedMessageRepository
+from app.rabbitmq import publisher
+from app.rabbitmq.messages import OrderMessage, ProductMessage, decode_message
 from app.DTO.UserCreate import UserCreate
+from app.DTO.UserUpdate import UserUpdate
 from app.DTO.ProductCreate import ProductCreate
 from app.DTO.OrderCreate import OrderCreate
 from app.DTO.AddressCreate import AddressCreate
 from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
 
 
 class TestUserRepository:
@@ -68,6 +79,27 @@ class TestUserRepository:
         assert updated_user.email == "updated@example.com"
         assert updated_user.description == "updated"
 
+    @pytest.mark.asyncio
+    async def test_partial_update_user(self, user_repository: UserRepository):
+        """Тест частичного обновления: меняются только переданные поля"""
+        user = await user_repository.create(
+            UserCreate(email="test@example.com", login="john_doe", description="test")
+        )
+
+        updated_user = await user_repository.update(
+            user.id, UserUpdate(email="partial@example.com")
+        )
+
+        assert updated_user.email == "partial@example.com"
+        assert updated_user.login == "john_doe"
+        assert updated_user.description == "test"
+
+    @pytest.mark.asyncio
+    async def test_update_missing_user(self, user_repository: UserRepository):
+        """Тест обновления несуществующего пользователя"""
+        with pytest.raises(Exception):
+            await user_repository.update(uuid4(), UserUpdate(login="ghost"))
+
     @pytest.mark.asyncio
     async def test_delete_user(self, user_repository: UserRepository):
         """Тест удаления пользователя"""
@@ -86,6 +118,30 @@ class TestUserRepository:
         users = await user_repository.get_by_filters()
         assert len(users) == 0
     
+    @pytest.mark.asyncio
+    async def test_get_page_with_relationships(self, session, user_repository: UserRepository, address_repository: AddressRepository, order_repository: OrderRepository, product_repository: ProductRepository):
+        """Тест include: связи всей страницы загружаются запросом на связь, без N+1"""
+        product = await product_repository.create(ProductCreate(name="Included", quantity=10))
+        for n in range(3):
+            user = await user_repository.create(UserCreate(email=f"inc{n}@example.com", login=f"inc{n}", description="inc"))
+            address = await address_repository.create(AddressCreate(user_id=user.id, street=f"Street {n}"))
+            for _ in range(n):
+                await order_repository.create(OrderCreate(user_id=user.id, address_id=address.id, product_id=product.id, date=datetime.now()))
+        session.expunge_all()
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(session.bind.sync_engine, "before_cursor_execute", listener)
+        try:
+            users, _ = await user_repository.get_page(None, 10, ("addresses", "orders"))
+        finally:
+            event.remove(session.bind.sync_engine, "before_cursor_execute", listener)
+
+        assert len(statements) == 3
+        assert [len(user.orders) for user in users] == [0, 1, 2]
+        assert all(len(user.addresses) == 1 for user in users)
+
+
 class TestProductRepository:
     @pytest.mark.asyncio
     async def test_create_product(self, product_repository: ProductRepository):
@@ -143,6 +199,117 @@ class TestProductRepository:
         products = await product_repository.get_by_filters()
         assert len(products) == 0
 
+    @pytest.mark.asyncio
+    async def test_get_page_products(self, product_repository: ProductRepository):
+        """Тест постраничного получения продуктов по курсору"""
+        for i in range(5):
+            await product_repository.create(ProductCreate(name=f"Product {i}", quantity=i))
+
+        names = []
+        cursor = None
+        pages = 0
+        while True:
+            products, cursor = await product_repository.get_page(cursor, limit=2)
+            names.extend(product.name for product in products)
+            pages += 1
+            if cursor is None:
+                break
+
+        assert pages == 3
+        assert sorted(names) == [f"Product {i}" for i in range(5)]
+        assert len(set(names)) == 5
+
+    @pytest.mark.asyncio
+    async def test_get_products_by_ids(self, product_repository: ProductRepository):
+        """Тест получения продуктов по списку ID одним запросом"""
+        first = await product_repository.create(ProductCreate(name="First", quantity=1))
+        await product_repository.create(ProductCreate(name="Other", quantity=1))
+        third = await product_repository.create(ProductCreate(name="Third", quantity=1))
+
+        products = await product_repository.get_by_ids([first.id, third.id, uuid4()])
+
+        assert sorted(product.name for product in products) == ["First", "Third"]
+        assert await product_repository.get_by_ids([]) == []
+
+    @pytest.mark.asyncio
+    async def test_get_page_invalid_cursor(self, product_repository: ProductRepository):
+        """Тест некорректного курсора"""
+        with pytest.raises(InvalidCursorError):
+            await product_repository.get_page("not-a-cursor")
+
+    @pytest.mark.asyncio
+    async def test_create_many_products(self, product_repository: ProductRepository):
+        """Тест массового создания продуктов с ошибкой в одной позиции"""
+        await product_repository.create(ProductCreate(name="Existing", quantity=1))
+
+        result = await product_repository.create_many([
+            ProductCreate(name="Bulk 1", quantity=1),
+            ProductCreate(name="Existing", quantity=2),
+            ProductCreate(name="Bulk 2", quantity=3),
+        ])
+
+        assert [index for index, _ in result.created] == [0, 2]
+        assert [product.name for _, product in result.created] == ["Bulk 1", "Bulk 2"]
+        assert [index for index, _ in result.errors] == [1]
+        products = await product_repository.get_by_filters()
+        assert len(products) == 3
+
+    @pytest.mark.asyncio
+    async def test_create_many_products_several_errors(
+        self, product_repository: ProductRepository
+    ):
+        """Тест массового создания, когда проблемных позиций несколько"""
+        await product_repository.create(ProductCreate(name="Existing", quantity=1))
+        names = ["A", "Existing", "B", "C", "D", "E", "Existing", "F"]
+
+        result = await product_repository.create_many(
+            [ProductCreate(name=name, quantity=1) for name in names]
+        )
+
+        assert [index for index, _ in result.created] == [0, 2, 3, 4, 5, 7]
+        assert [product.name for _, product in result.created] == [
+            "A", "B", "C", "D", "E", "F"
+        ]
+        assert [index for index, _ in result.errors] == [1, 6]
+        products = await product_repository.get_by_filters()
+        assert len(products) == 7
+
+
+    @pytest.mark.asyncio
+    async def test_upsert_many_products(self, product_repository: ProductRepository):
+        """Тест массового upsert по имени с повторами внутри пачки"""
+        existing = await product_repository.create(ProductCreate(name="Existing", quantity=1))
+
+        products = await product_repository.upsert_many([
+            ProductCreate(name="Existing", quantity=5),
+            ProductCreate(name="New", quantity=2),
+            ProductCreate(name="New", quantity=3),
+        ])
+        await product_repository.session.commit()
+
+        assert {product.name: product.quantity for product in products} == {"Existing": 5, "New": 3}
+        assert (await product_repository.get_by_id(existing.id)).quantity == 5
+        assert len(await product_repository.get_by_filters()) == 2
+
+    @pytest.mark.asyncio
+    async def test_process_product_batch_keeps_message_order(self, session, product_repository: ProductRepository):
+        """Тест пакетной обработки: обнуление остатка после upsert того же товара"""
+        product = await product_repository.create(ProductCreate(name="Ordered", quantity=1))
+        messages = [
+            msgspec.convert(
+                {"action": "upsert", "product": {"name": "Ordered", "quantity": 50}},
+                ProductMessage,
+            ),
+            msgspec.convert(
+                {"action": "mark_out_of_stock", "product_id": str(product.id)},
+                ProductMessage,
+            ),
+        ]
+
+        await _process_product_batch(session, messages)
+
+        assert (await product_repository.get_by_id(product.id)).quantity == 0
+
 
 class TestOrderRepository:
     @pytest.mark.asyncio
@@ -350,4 +517,168 @@ class TestOrderRepository:
         assert result is None
         
         orders = await order_repository.get_by_filters()
-        assert len(orders) == 0
\ No newline at end of file
+        assert len(orders) == 0
+
+    @pytest.mark.asyncio
+    async def test_process_order_message(self, session, order_repository: OrderRepository, user_repository: UserRepository, product_repository: ProductRepository, address_repository: AddressRepository):
+        """Тест обработки сообщения о заказе: все позиции и списания одной транзакцией"""
+        user = await user_repository.create(UserCreate(email="buyer@example.com", login="buyer", description="buyer"))
+        address = await address_repository.create(AddressCreate(user_id=user.id, street="Order Street"))
+        first = await product_repository.create(ProductCreate(name="First", quantity=5))
+        second = await product_repository.create(ProductCreate(name="Second", quantity=1))
+
+        await _process_order_message(session, msgspec.convert({
+            "action": "create",
+            "order": {
+                "user_id": str(user.id),
+                "address_id": str(address.id),
+                "date": datetime.now().isoformat(),
+                "products": [
+                    {"product_id": str(first.id), "quantity": 2},
+                    {"product_id": str(second.id), "quantity": 3},
+                ],
+            },
+        }, OrderMessage))
+
+        orders = await order_repository.get_by_filters(user_id=user.id)
+        assert sorted(order.product_id for order in orders) == sorted([first.id, second.id])
+        assert (await product_repository.get_by_id(first.id)).quantity == 3
+        assert (await product_repository.get_by_id(second.id)).quantity == 0
+
+        with pytest.raises(ValueError, match="out of stock"):
+            await _process_order_message(session, msgspec.convert({
+                "action": "create",
+                "order": {
+                    "user_id": str(user.id),
+                    "address_id": str(address.id),
+                    "date": datetime.now().isoformat(),
+                    "products": [
+                        {"product_id": str(first.id), "quantity": 1},
+                        {"product_id": str(second.id), "quantity": 1},
+                    ],
+                },
+            }, OrderMessage))
+
+    @pytest.mark.asyncio
+    async def test_async_order_saved_under_tracking_id(self, session, monkeypatch, order_repository: OrderRepository, user_repository: UserRepository, product_repository: ProductRepository, address_repository: AddressRepository):
+        """Тест асинхронного приёма: заказ сохраняется под ID из ответа 202"""
+        user = await user_repository.create(UserCreate(email="queued@example.com", login="queued", description="queued"))
+        address = await address_repository.create(AddressCreate(user_id=user.id, street="Queue Street"))
+        product = await product_repository.create(ProductCreate(name="Queued", quantity=5))
+        published = []
+
+        class FakePublisher:
+            async def publish(self, routing_key, message):
+                published.append(message)
+
+        monkeypatch.setattr(publisher, "aio_pika", SimpleNamespace(
+            Message=lambda body, **kwargs: SimpleNamespace(body=body, **kwargs),
+            DeliveryMode=SimpleNamespace(PERSISTENT=2),
+        ))
+        monkeypatch.setattr(publisher._PublisherState, "publisher", FakePublisher())
+
+        tracking_id = await publisher.publish_order(OrderCreate(
+            user_id=user.id, address_id=address.id, product_id=product.id, date=datetime.now(),
+        ))
+        message = published[0]
+        await _process_order_message(
+            session, decode_message(message.body, message.content_type, OrderMessage)
+        )
+
+        order = await order_repository.get_by_id(tracking_id)
+        assert order is not None
+        assert order.product_id == product.id
+
+    @pytest.mark.asyncio
+    async def test_redelivered_order_applied_once(self, session, order_repository: OrderRepository, user_repository: UserRepository, product_repository: ProductRepository, address_repository: AddressRepository):
+        """Тест: повторная доставка зафиксированного сообщения не создаёт заказ снова"""
+        user = await user_repository.create(UserCreate(email="again@example.com", login="again", description="again"))
+        address = await address_repository.create(AddressCreate(user_id=user.id, street="Again Street"))
+        product = await product_repository.create(ProductCreate(name="Again", quantity=5))
+        payload = msgspec.convert({
+            "action": "create",
+            "order": {
+                "user_id": str(user.id),
+                "address_id": str(address.id),
+                "date": datetime.now().isoformat(),
+                "products": [{"product_id": str(product.id), "quantity": 1}],
+            },
+        }, OrderMessage)
+
+        # Вторая доставка - в той же пачке и после фиксации первой
+        await _process_new(session, "orders", _process_order_batch, ["m1", "m1"], [payload, payload])
+        await _process_new(session, "orders", _process_order_batch, ["m1"], [payload])
+
+        orders = await order_repository.get_by_filters(user_id=user.id)
+        assert len(orders) == 1
+        assert (await product_repository.get_by_id(product.id)).quantity == 4
+
+        repo = ProcessedMessageRepository(session)
+        assert await repo.add("orders", ["m1", "m2", None]) == [False, True, True]
+        assert await repo.add("products", ["m1"]) == [True]
+        await session.rollback()
+        assert await repo.purge(datetime.now()) == 1
+        assert await repo.add("orders", ["m1"]) == [True]
+        await session.rollback()
+
+    @pytest.mark.asyncio
+    async def test_process_order_batch_merges_deltas(self, session, order_repository: OrderRepository, user_repository: UserRepository, product_repository: ProductRepository, address_repository: AddressRepository):
+        """Тест пакетной обработки: списания по одному продукту складываются"""
+        user = await user_repository.create(UserCreate(email="batch@example.com", login="batch", description="batch"))
+        address = await address_repository.create(AddressCreate(user_id=user.id, street="Batch Street"))
+        product = await product_repository.create(ProductCreate(name="Batched", quantity=10))
+
+        def order_message(quantity):
+            return msgspec.convert({
+                "action": "create",
+                "order": {
+                    "user_id": str(user.id),
+                    "address_id": str(address.id),
+                    "date": datetime.now().isoformat(),
+                    "products": [{"product_id": str(product.id), "quantity": quantity}],
+                },
+            }, OrderMessage)
+
+        await _process_order_batch(session, [order_message(2), order_message(3)])
+
+        orders = await order_repository.get_by_filters(user_id=user.id)
+        assert len(orders) == 2
+        assert (await product_repository.get_by_id(product.id)).quantity == 5
+
+    @pytest.mark.asyncio
+    async def test_order_stats(self, session, order_repository: OrderRepository, user_repository: UserRepository, product_repository: ProductRepository, address_repository: AddressRepository):
+        """Тест сводок: консьюмер прибавляет заказы, пересчёт сверяет с таблицей заказов"""
+        user = await user_repository.create(UserCreate(email="stats@example.com", login="stats", description="stats"))
+        address = await address_repository.create(AddressCreate(user_id=user.id, street="Stats Street"))
+        first = await product_repository.create(ProductCreate(name="Popular", quantity=10))
+        second = await product_repository.create(ProductCreate(name="Rare", quantity=10))
+        stats_repository = StatsRepository(session)
+
+        def order_message(*products, date="2024-01-01T10:00:00"):
+            return msgspec.convert({
+                "action": "create",
+                "order": {
+                    "user_id": str(user.id),
+                    "address_id": str(address.id),
+                    "date": date,
+                    "products": [{"product_id": str(product.id)} for product in products],
+                },
+            }, OrderMessage)
+
+        await _process_order_batch(session, [order_message(first, second), order_message(first)])
+        await _process_order_message(session, order_message(first, date="2024-02-01T10:00:00"))
+
+        products = await stats_repository.get_product_stats()
+        assert [(row.product_id, row.orders_count) for row in products] == [(first.id, 3), (second.id, 1)]
+        (user_stats,) = await stats_repository.get_user_stats()
+        assert user_stats.orders_count == 4
+        assert user_stats.first_order_at.month == 1 and user_stats.last_order_at.month == 2
+
+        # Удаление через API сводки не трогает - их догоняет пересчёт
+        orders = await order_repository.get_by_filters(user_id=user.id, product_id=second.id)
+        await order_repository.delete(orders[0].id)
+        await stats_repository.refresh()
+
+        products = await stats_repository.get_product_stats()
+        assert [(row.product_id, row.orders_count) for row in products] == [(first.id, 3)]
+        assert (await stats_repository.get_user_stats())[0].orders_count == 3
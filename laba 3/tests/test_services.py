@@ -1,3 +1,7 @@
+import asyncio
+import json
+import time
+
 from pydantic import ValidationError
 import pytest
 from unittest.mock import Mock, AsyncMock
@@ -6,9 +10,20 @@ from app.repositories.user_repository import UserRepository
 from app.repositories.product_repository import ProductRepository
 from app.repositories.order_repository import OrderRepository
 from app.repositories.address_repository import AddressRepository
+from app.repositories.processed_message_repository import ProcessedMessageRepository
 from app.services.order_service import OrderService
 from app.services.product_service import ProductService
 from app.DTO.ProductCreate import ProductCreate
+from app.cache.entity_cache import CACHE_TTL_JITTER, ENTITY_CACHES, EntityCache, negative_cache_stats
+from app.cache.local_cache import LocalCache
+from app.cache import invalidation, stock_counters
+from app.cache.stock_counters import OutOfStockError
+from app.rabbitmq import consumer, dedup, retry
+from app.rabbitmq.publisher import Publisher, PublisherUnavailableError
+from app.rabbitmq.messages import OrderMessage, decode_message
+import msgspec
+from app.models import Product
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 class TestOrderService:
     @pytest.mark.asyncio
@@ -210,6 +225,28 @@ class TestProductService:
 
         mock_product_repo.delete.assert_called_once_with(product_id)
 
+    @pytest.mark.asyncio
+    async def test_delete_product_invalidates_after_db(self):
+        """Кэш сбрасывается только после удаления из БД"""
+        product_id = UUID('12345678-1234-5678-1234-567812345678')
+        calls = []
+        mock_product_repo = AsyncMock(spec=ProductRepository)
+        mock_product_repo.delete.side_effect = lambda id: calls.append("db")
+        product_service = ProductService(product_repository=mock_product_repo)
+        product_service._cache = AsyncMock(spec=EntityCache)
+        product_service._cache.delete.side_effect = lambda id: calls.append("cache")
+
+        await product_service.delete(product_id)
+
+        assert calls == ["db", "cache"]
+
+        calls.clear()
+        mock_product_repo.delete.side_effect = RuntimeError("db is down")
+        with pytest.raises(RuntimeError):
+            await product_service.delete(product_id)
+
+        assert calls == []
+
     @pytest.mark.asyncio
     async def test_get_products_by_filter(self):
         """Тест получения продуктов по фильтру"""
@@ -226,4 +263,617 @@ class TestProductService:
         result = await product_service.get_by_filter(skip=0, limit=10)
 
         assert len(result) == 2
-        mock_product_repo.get_by_filters.assert_called_once_with(0, 10)
\ No newline at end of file
+        mock_product_repo.get_by_filters.assert_called_once_with(0, 10)
+
+
+class TestEntityCache:
+    @pytest.mark.asyncio
+    async def test_read_through_hit(self):
+        """Тест чтения из кэша без обращения к БД"""
+        product_id = UUID('12345678-1234-5678-1234-567812345678')
+        redis = AsyncMock()
+        redis.get.return_value = (
+            '{"id": "12345678-1234-5678-1234-567812345678", "name": "Cached", '
+            '"quantity": 3, "created_at": null, "updated_at": null}'
+        )
+        loader = AsyncMock()
+
+        cache = EntityCache(redis, ENTITY_CACHES["product"])
+        result = await cache.get_or_load(product_id, loader)
+
+        assert result.id == product_id
+        assert result.name == "Cached"
+        assert result.quantity == 3
+        loader.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_read_through_miss(self):
+        """Тест загрузки из БД и записи в кэш при промахе"""
+        product_id = UUID('12345678-1234-5678-1234-567812345678')
+        redis = AsyncMock()
+        redis.get.return_value = None
+        product = Mock(id=product_id, quantity=5, created_at=None, updated_at=None)
+        product.name = "Loaded"
+        loader = AsyncMock(return_value=product)
+
+        cache = EntityCache(redis, ENTITY_CACHES["product"])
+        result = await cache.get_or_load(product_id, loader)
+
+        assert result is product
+        loader.assert_called_once_with(product_id)
+        key, ttl, payload = redis.setex.call_args.args
+        assert key == f"product:{product_id}"
+        assert abs(ttl - cache.ttl) <= cache.ttl * CACHE_TTL_JITTER + 1
+        assert '"name": "Loaded"' in payload
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_load_once(self):
+        """Тест: параллельные промахи по одному ключу дают одну загрузку из БД"""
+        product_id = UUID('12345678-1234-5678-1234-567812345678')
+        redis = AsyncMock()
+        redis.get.return_value = None
+        product = Mock(id=product_id, quantity=5, created_at=None, updated_at=None)
+        product.name = "Loaded"
+
+        async def loader(id):
+            await asyncio.sleep(0.01)
+            return product
+
+        loader = AsyncMock(side_effect=loader)
+        cache = EntityCache(redis, ENTITY_CACHES["product"])
+        results = await asyncio.gather(
+            *(cache.get_or_load(product_id, loader) for _ in range(50))
+        )
+
+        assert results[0] is product
+        assert all(result is not product for result in results[1:])
+        assert all(result.id == product_id for result in results)
+        assert all(result.name == "Loaded" for result in results)
+        loader.assert_called_once_with(product_id)
+        redis.setex.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_early_refresh_before_expiry(self):
+        """Тест: запись на грани истечения обновляется из БД заранее"""
+        product_id = UUID('12345678-1234-5678-1234-567812345678')
+        redis = AsyncMock()
+        redis.get.return_value = json.dumps({
+            "id": str(product_id), "name": "Stale", "quantity": 1,
+            "created_at": None, "updated_at": None,
+            "_delta": 10.0, "_expires": time.time(),
+        })
+        product = Mock(id=product_id, quantity=2, created_at=None, updated_at=None)
+        product.name = "Fresh"
+        loader = AsyncMock(return_value=product)
+
+        cache = EntityCache(redis, ENTITY_CACHES["product"])
+        result = await cache.get_or_load(product_id, loader)
+
+        assert result is product
+        loader.assert_called_once_with(product_id)
+
+
+    @pytest.mark.asyncio
+    async def test_get_many_mget_and_backfill(self):
+        """Тест: один MGET, одна загрузка промахов и запись их конвейером"""
+        cached_id = UUID('12345678-1234-5678-1234-567812345678')
+        missing_id = UUID('87654321-4321-8765-4321-876543218765')
+        redis = AsyncMock()
+        redis.mget.return_value = [
+            '{"id": "12345678-1234-5678-1234-567812345678", "name": "Cached", '
+            '"quantity": 3, "created_at": null, "updated_at": null}',
+            None,
+        ]
+        pipe = Mock(execute=AsyncMock())
+        redis.pipeline = Mock(return_value=pipe)
+        product = Mock(id=missing_id, quantity=5, created_at=None, updated_at=None)
+        product.name = "Loaded"
+        loader = AsyncMock(return_value=[product])
+
+        cache = EntityCache(redis, ENTITY_CACHES["product"])
+        result = await cache.get_many([cached_id, missing_id, cached_id], loader)
+
+        assert result[cached_id].name == "Cached"
+        assert result[missing_id] is product
+        redis.mget.assert_called_once_with(
+            [f"product:{cached_id}", f"product:{missing_id}"]
+        )
+        loader.assert_called_once_with([missing_id])
+        assert pipe.setex.call_args.args[0] == f"product:{missing_id}"
+        pipe.execute.assert_called_once()
+
+
+    @pytest.mark.asyncio
+    async def test_missing_entity_tombstone(self):
+        """Тест: "не найдено" кэшируется и повторно в БД не идёт"""
+        product_id = UUID('12345678-1234-5678-1234-567812345678')
+        redis = AsyncMock()
+        redis.get.return_value = None
+        pipe = Mock(execute=AsyncMock())
+        redis.pipeline = Mock(return_value=pipe)
+        loader = AsyncMock(return_value=None)
+        cache = EntityCache(redis, ENTITY_CACHES["product"])
+
+        assert await cache.get_or_load(product_id, loader) is None
+        key, ttl, tombstone = pipe.setex.call_args.args
+        assert key == f"product:{product_id}"
+        assert ttl == cache.negative_ttl
+
+        redis.get.return_value = tombstone
+        prevented = negative_cache_stats.prevented_reads
+        assert await cache.get_or_load(product_id, loader) is None
+        assert await cache.get(product_id) is None
+        loader.assert_called_once_with(product_id)
+        assert negative_cache_stats.prevented_reads == prevented + 1
+
+
+class TestLocalCache:
+    def test_lru_eviction(self):
+        """Тест вытеснения самой давно использованной записи"""
+        cache = LocalCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        """Тест устаревания записи по TTL"""
+        cache = LocalCache(maxsize=10, ttl=0)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_stale_fill_dropped(self):
+        """Тест: заполнение, начатое до удаления ключа, отбрасывается"""
+        cache = LocalCache(maxsize=10, ttl=60)
+        generation = cache.generation("a")
+        cache.delete("a")
+        cache.set("a", "old", generation)
+
+        assert cache.get("a") is None
+        assert cache.stats()["stale_fills"] == 1
+
+        cache.set("a", "new", cache.generation("a"))
+        assert cache.get("a") == "new"
+
+    def test_forgotten_generations_stay_conservative(self):
+        """Тест: после вытеснения поколений старые заполнения не проходят"""
+        cache = LocalCache(maxsize=1, ttl=60)
+        started = {key: cache.generation(key) for key in ("a", "b")}
+        cache.delete("a")
+        cache.delete("b")
+
+        cache.set("a", 1, started["a"])
+        cache.set("b", 2, started["b"])
+        cache.set("c", 3, cache.generation("c"))
+
+        assert cache.get("a") is None
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    @pytest.mark.asyncio
+    async def test_invalidation_during_redis_read(self, monkeypatch):
+        """Тест: инвалидация во время чтения из Redis не даёт закэшировать старое"""
+        product_id = UUID('12345678-1234-5678-1234-567812345678')
+        local = LocalCache(maxsize=10, ttl=60)
+        redis = AsyncMock()
+        cache = EntityCache(redis, ENTITY_CACHES["product"], local)
+
+        async def read_then_invalidated(key):
+            # Пока ответ Redis в пути, приходит сообщение об инвалидации
+            invalidation._handle_message(json.dumps({"origin": "other", "keys": [key]}))
+            return (
+                '{"id": "12345678-1234-5678-1234-567812345678", "name": "Stale", '
+                '"quantity": 3, "created_at": null, "updated_at": null}'
+            )
+
+        redis.get.side_effect = read_then_invalidated
+        monkeypatch.setattr(invalidation, "evict_local", lambda keys: local.delete(*keys))
+
+        result = await cache.get(product_id)
+
+        assert result.name == "Stale"
+        assert local.get(cache.key(product_id)) is None
+
+    @pytest.mark.asyncio
+    async def test_l1_in_front_of_redis(self):
+        """Тест: повторное чтение обслуживается L1 без обращения к Redis"""
+        product_id = UUID('12345678-1234-5678-1234-567812345678')
+        redis = AsyncMock()
+        redis.get.return_value = (
+            '{"id": "12345678-1234-5678-1234-567812345678", "name": "Cached", '
+            '"quantity": 3, "created_at": null, "updated_at": null}'
+        )
+        local = LocalCache(maxsize=10, ttl=60)
+        cache = EntityCache(redis, ENTITY_CACHES["product"], local)
+
+        first = await cache.get(product_id)
+        second = await cache.get(product_id)
+
+        assert first.name == second.name == "Cached"
+        redis.get.assert_called_once()
+        assert local.stats()["hits"] == 1
+
+        await cache.delete(product_id)
+        assert local.get(cache.key(product_id)) is None
+
+    @pytest.mark.asyncio
+    async def test_write_publishes_invalidation(self):
+        """Тест: запись в кэш с L1 рассылается остальным воркерам"""
+        product = Mock(id=UUID('12345678-1234-5678-1234-567812345678'), quantity=1,
+                       created_at=None, updated_at=None)
+        product.name = "Published"
+        redis = AsyncMock()
+        cache = EntityCache(redis, ENTITY_CACHES["product"], LocalCache(10, 60))
+
+        await cache.set(product)
+
+        channel, message = redis.publish.call_args.args
+        assert channel == invalidation.INVALIDATION_CHANNEL
+        assert cache.key(product.id) in message
+
+    def test_invalidation_skips_own_messages(self, monkeypatch):
+        """Тест: чужое сообщение вытесняет ключ из L1, своё - нет"""
+        evicted = []
+        monkeypatch.setattr(invalidation, "evict_local", evicted.extend)
+
+        invalidation._handle_message(
+            json.dumps({"origin": invalidation.WORKER_ID, "keys": ["product:own"]})
+        )
+        invalidation._handle_message(
+            json.dumps({"origin": "other-worker", "keys": ["product:other"]})
+        )
+
+        assert evicted == ["product:other"]
+
+
+class TestStockCounters:
+    @pytest.fixture
+    def redis(self, monkeypatch):
+        redis = AsyncMock()
+        monkeypatch.setattr(stock_counters, "get_redis", lambda: redis)
+        return redis
+
+    @pytest.mark.asyncio
+    async def test_reserve_out_of_stock(self, redis):
+        """Тест: заказ с закончившимся товаром отклоняется целиком"""
+        first = UUID('12345678-1234-5678-1234-567812345678')
+        second = UUID('87654321-4321-8765-4321-876543218765')
+        reserve = AsyncMock(return_value=[2, 2])
+        redis.register_script = Mock(return_value=reserve)
+
+        with pytest.raises(OutOfStockError, match=str(second)):
+            await stock_counters.reserve_stock([(first, 1), (second, 1)])
+
+        keys = reserve.call_args.kwargs["keys"]
+        assert keys == [
+            stock_counters.DIRTY_KEY,
+            stock_counters.stock_key(first),
+            stock_counters.stock_key(second),
+        ]
+        assert reserve.call_args.kwargs["args"] == [1, 1]
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_quantities(self, redis, engine, session):
+        """Тест: изменённые счётчики записываются в products.quantity"""
+        product = Product(name="Flushed", quantity=10)
+        session.add(product)
+        await session.commit()
+        key = stock_counters.stock_key(product.id)
+        redis.spop.return_value = [key.encode()]
+        redis.mget.return_value = [b"7"]
+        unlock = AsyncMock()
+        redis.register_script = Mock(return_value=unlock)
+        session_factory = async_sessionmaker(
+            engine, expire_on_commit=False, class_=AsyncSession
+        )
+
+        assert await stock_counters.flush_stock(session_factory) == 1
+
+        await session.refresh(product)
+        assert product.quantity == 7
+        redis.sadd.assert_not_called()
+        token = redis.set.call_args.args[1]
+        unlock.assert_awaited_once_with(
+            keys=[stock_counters.FLUSH_LOCK_KEY], args=[token]
+        )
+
+    @pytest.mark.asyncio
+    async def test_flush_skipped_while_locked(self, redis):
+        """Тест: пока пачку пишет другой воркер, счётчики не трогаются"""
+        redis.set.return_value = None
+
+        assert await stock_counters.flush_stock() == 0
+
+        assert redis.set.call_args.kwargs["nx"] is True
+        redis.spop.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_sync_marks_counters_dirty(self, redis, monkeypatch):
+        """Тест: остаток, записанный в обход счётчика, попадёт в следующую пачку"""
+        monkeypatch.setattr(stock_counters, "INVENTORY_MODE", "redis")
+        pipe = Mock(execute=AsyncMock())
+        redis.pipeline = Mock(return_value=pipe)
+        product = Mock(id=UUID('12345678-1234-5678-1234-567812345678'), quantity=5)
+
+        await stock_counters.sync_stock(product)
+
+        key = stock_counters.stock_key(product.id)
+        pipe.set.assert_called_once_with(key, 5)
+        pipe.sadd.assert_called_once_with(stock_counters.DIRTY_KEY, key)
+        pipe.execute.assert_awaited_once()
+
+
+class TestConsumer:
+    @pytest.fixture(autouse=True)
+    def processed_messages(self, monkeypatch):
+        """Журнал обработанных сообщений в БД: все сообщения новые"""
+        add = AsyncMock(side_effect=lambda queue, ids: [True] * len(ids))
+        monkeypatch.setattr(ProcessedMessageRepository, "add", add)
+        return add
+
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency(self):
+        """Тест: одновременно обрабатывается не больше заданного числа сообщений"""
+        running = 0
+        peak = 0
+
+        async def handler(message):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        bounded = consumer._Bounded(handler, 3)
+        await asyncio.gather(*(bounded(Mock()) for _ in range(10)))
+
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_drain_waits_for_in_flight_messages(self, monkeypatch):
+        """Тест: остановка дожидается обрабатываемых и уже полученных сообщений"""
+        monkeypatch.setattr(consumer, "async_session_factory", lambda: AsyncMock())
+        done = []
+
+        async def handler(message):
+            await asyncio.sleep(0.01)
+            done.append(message)
+
+        bounded = consumer._Bounded(handler, 2)
+        tasks = [asyncio.create_task(bounded(n)) for n in range(5)]
+        await asyncio.sleep(0)
+        await bounded.drain()
+        assert len(done) == 5
+
+        process_batch = AsyncMock()
+        batcher = consumer._MessageBatcher(
+            "orders",
+            OrderMessage,
+            process_batch,
+            Mock(fail=AsyncMock()),
+            dedup.Deduplicator("orders"),
+            2,
+            0.01,
+        )
+        run = asyncio.create_task(batcher.run())
+        messages = [
+            Mock(
+                body=json.dumps({"action": "update_status", "order_id": str(UUID(int=n))}).encode(),
+                content_type="application/json",
+                ack=AsyncMock(),
+            )
+            for n in range(3)
+        ]
+        for message in messages:
+            await batcher.add(message)
+        await batcher.drain()
+        run.cancel()
+
+        assert process_batch.call_count == 2
+        messages[2].ack.assert_called_once_with(multiple=True)
+        await asyncio.gather(*tasks)
+
+    @pytest.mark.asyncio
+    async def test_batch_falls_back_to_single_messages(self, monkeypatch):
+        """Тест: упавшая пачка обрабатывается по одному, сбои уходят в очереди повторов"""
+        monkeypatch.setattr(consumer, "async_session_factory", lambda: AsyncMock())
+        messages = [
+            Mock(
+                body=json.dumps({"action": "update_status", "order_id": str(UUID(int=n))}).encode(),
+                content_type="application/json",
+                ack=AsyncMock(),
+                reject=AsyncMock(),
+            )
+            for n in range(3)
+        ]
+        messages.append(Mock(body=b"not json", content_type=None, ack=AsyncMock(), reject=AsyncMock()))
+
+        async def process_batch(session, payloads):
+            if len(payloads) > 1 or payloads[0].order_id == UUID(int=1):
+                raise ValueError("poison")
+
+        process_batch = AsyncMock(side_effect=process_batch)
+        retry_queues = Mock(fail=AsyncMock())
+        batcher = consumer._MessageBatcher(
+            "orders", OrderMessage, process_batch, retry_queues, dedup.Deduplicator("orders"), 10, 0.01
+        )
+        await batcher.handle(messages)
+
+        assert process_batch.call_count == 4
+        failed = [call.args[0] for call in retry_queues.fail.call_args_list]
+        assert failed == [messages[3], messages[1]]
+        messages[3].ack.assert_called_once_with()
+        messages[2].ack.assert_called_once_with(multiple=True)
+        messages[0].ack.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_batcher_survives_settle_failure(self, monkeypatch):
+        """Тест: сбой канала при разборе пачки не останавливает консьюмер"""
+        monkeypatch.setattr(consumer, "async_session_factory", lambda: AsyncMock())
+
+        def delivery(body):
+            return Mock(
+                body=body,
+                content_type="application/json",
+                message_id=None,
+                processed=False,
+                ack=AsyncMock(),
+                nack=AsyncMock(),
+            )
+
+        valid = json.dumps({"action": "update_status", "order_id": str(UUID(int=1))}).encode()
+        broken, pending = delivery(b"not json"), delivery(valid)
+        retry_queues = Mock(fail=AsyncMock(side_effect=ConnectionError("channel closed")))
+        process_batch = AsyncMock()
+        batcher = consumer._MessageBatcher(
+            "orders", OrderMessage, process_batch, retry_queues, dedup.Deduplicator("orders"), 10, 0.01
+        )
+        task = asyncio.create_task(batcher.run())
+        try:
+            await batcher.add(broken)
+            await batcher.add(pending)
+            await asyncio.wait_for(batcher.drain(), 1)
+
+            broken.nack.assert_called_once_with(requeue=True)
+            pending.nack.assert_called_once_with(requeue=True)
+            process_batch.assert_not_called()
+
+            later = delivery(valid)
+            await batcher.add(later)
+            await asyncio.wait_for(batcher.drain(), 1)
+        finally:
+            task.cancel()
+
+        process_batch.assert_called_once()
+        later.ack.assert_called_once_with(multiple=True)
+
+    @pytest.mark.asyncio
+    async def test_batch_skips_duplicate_messages(self, monkeypatch):
+        """Тест: дубликаты подтверждаются без обращения к БД, занятые - откладываются"""
+        monkeypatch.setattr(consumer, "async_session_factory", lambda: AsyncMock())
+        messages = [
+            Mock(
+                body=json.dumps({"action": "update_status", "order_id": str(UUID(int=n))}).encode(),
+                content_type="application/json",
+                message_id=f"m{n}",
+                ack=AsyncMock(),
+            )
+            for n in range(3)
+        ]
+        process_batch = AsyncMock()
+        retry_queues = Mock(fail=AsyncMock())
+        deduplicator = Mock(
+            claim=AsyncMock(return_value=[dedup.NEW, dedup.DUPLICATE, dedup.IN_FLIGHT]),
+            mark_done=AsyncMock(),
+            release=AsyncMock(),
+        )
+        batcher = consumer._MessageBatcher(
+            "orders", OrderMessage, process_batch, retry_queues, deduplicator, 10, 0.01
+        )
+        await batcher.handle(messages)
+
+        deduplicator.claim.assert_called_once_with(["m0", "m1", "m2"])
+        assert len(process_batch.call_args.args[1]) == 1
+        assert list(deduplicator.mark_done.call_args.args[0]) == ["m0"]
+        assert retry_queues.fail.call_args.args[0] is messages[2]
+        messages[2].ack.assert_called_once_with(multiple=True)
+
+    @pytest.mark.asyncio
+    async def test_deduplicator_claim(self, monkeypatch):
+        """Тест: захват идемпотентного ключа одним SET NX GET на сообщение"""
+        pipe = Mock(execute=AsyncMock(return_value=[None, b"done", b"pending"]))
+        redis = Mock(pipeline=Mock(return_value=pipe))
+        monkeypatch.setattr(dedup, "get_redis", lambda: redis)
+
+        statuses = await dedup.Deduplicator("orders").claim(["a", None, "b", "c"])
+
+        assert statuses == [dedup.NEW, dedup.NEW, dedup.DUPLICATE, dedup.IN_FLIGHT]
+        assert pipe.set.call_count == 3
+        pipe.set.assert_any_call(
+            "msg:orders:a", "pending", nx=True, ex=dedup.RABBITMQ_CLAIM_TTL, get=True
+        )
+
+    def test_decode_messages_by_content_type(self):
+        """Тест декодирования сообщений из JSON и msgpack по content_type"""
+        payload = {
+            "action": "create",
+            "order": {
+                "user_id": "12345678-1234-5678-1234-567812345678",
+                "address_id": "12345678-1234-5678-1234-567812345678",
+                "date": "2024-01-01T10:00:00",
+                "products": [{"product_id": "87654321-4321-8765-4321-876543218765"}],
+            },
+        }
+
+        from_json = decode_message(json.dumps(payload).encode(), None, OrderMessage)
+        from_msgpack = decode_message(
+            msgspec.msgpack.encode(payload), "application/msgpack", OrderMessage
+        )
+
+        assert from_json == from_msgpack
+        assert from_json.order.products[0].product_id == UUID('87654321-4321-8765-4321-876543218765')
+        assert from_json.order.products[0].quantity == 1
+        with pytest.raises(msgspec.ValidationError):
+            decode_message(b'{"action": "create", "order": {}}', None, OrderMessage)
+
+    def test_retry_route(self):
+        """Тест: временные сбои - в очередь повтора с ростом попытки, дальше - в DLQ"""
+        timeout = TimeoutError("db timeout")
+
+        assert retry.retry_route("orders", None, timeout) == ("orders.retry.1", 1)
+        assert retry.retry_route("orders", {retry.RETRY_HEADER: 2}, timeout) == ("orders.retry.3", 3)
+        assert retry.retry_route(
+            "orders", {retry.RETRY_HEADER: retry.RABBITMQ_MAX_RETRIES}, timeout
+        ) == ("orders.dead", retry.RABBITMQ_MAX_RETRIES + 1)
+        assert retry.retry_route("orders", None, OutOfStockError("gone")) == ("orders.dead", 1)
+        assert retry.retry_delay_ms(3) == retry.RABBITMQ_RETRY_DELAY_MS * 4
+        in_flight = dedup.MessageInFlightError("busy")
+        assert retry.retry_route("orders", {retry.RETRY_HEADER: 2}, in_flight) == ("orders.retry.2", 2)
+
+
+class TestPublisher:
+    @staticmethod
+    def make_channels(publish):
+        channel = Mock(default_exchange=Mock(publish=AsyncMock(side_effect=publish)))
+        acquired = AsyncMock(__aenter__=AsyncMock(return_value=channel))
+        return Mock(acquire=Mock(return_value=acquired)), channel
+
+    @pytest.mark.asyncio
+    async def test_publishes_in_batches(self):
+        """Тест: одновременные публикации уходят пачками через канал из пула"""
+        channels, channel = self.make_channels(lambda message, routing_key, timeout: None)
+        publisher = Publisher(channels, 4, 0.01)
+        run = asyncio.create_task(publisher.run())
+
+        await asyncio.gather(*(publisher.publish("orders", n) for n in range(10)))
+        await publisher.drain()
+        run.cancel()
+
+        assert channel.default_exchange.publish.call_count == 10
+        assert channels.acquire.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_confirm_fails_only_its_message(self):
+        """Тест: неподтверждённое сообщение - ошибка только у его отправителя"""
+        def publish(message, routing_key, timeout):
+            if message == 1:
+                raise RuntimeError("nack")
+
+        channels, _ = self.make_channels(publish)
+        publisher = Publisher(channels, 10, 0.01)
+        run = asyncio.create_task(publisher.run())
+
+        results = await asyncio.gather(
+            *(publisher.publish("orders", n) for n in range(3)), return_exceptions=True
+        )
+        run.cancel()
+
+        assert results[0] is None and results[2] is None
+        assert isinstance(results[1], PublisherUnavailableError)